@@ -0,0 +1,51 @@
+"""Per-call latency of each clipboard backend available on this machine.
+
+Overwrites the system clipboard on macOS.
+
+Run: uv run python benchmarks/bench_clipboard.py [calls]
+"""
+
+import statistics
+import sys
+import time
+
+from clippy import clipboard
+
+
+def _backends() -> dict[str, clipboard.Backend]:
+    backends: dict[str, clipboard.Backend] = {"memory": clipboard.MemoryBackend()}
+    try:
+        backends["appkit"] = clipboard.AppKitBackend()
+    except ImportError:
+        pass
+    if sys.platform == "darwin":
+        backends["subprocess"] = clipboard.SubprocessBackend()
+    return backends
+
+
+def _time(fn, calls: int) -> list[float]:
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main() -> None:
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    payload = "clippy benchmark " * 64
+    # Pasting injects real keystrokes, so only the fake backend is timed for it.
+    print(f"{'backend':12} {'op':6} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, backend in _backends().items():
+        ops = {"write": lambda: backend.write(payload), "read": backend.read}
+        if name == "memory":
+            ops["paste"] = backend.paste
+        for op, fn in ops.items():
+            samples = sorted(_time(fn, calls))
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+            print(f"{name:12} {op:6} {statistics.median(samples):9.3f} {p95:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
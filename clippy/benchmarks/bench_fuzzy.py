@@ -0,0 +1,52 @@
+"""Per-keystroke latency of the picker's fuzzy matcher.
+
+Run: uv run python benchmarks/bench_fuzzy.py [entries]
+"""
+
+import random
+import string
+import sys
+import time
+
+from clippy import fuzzy
+
+
+FRAME_MS = 16.7
+WORDS = [
+    "git", "push", "origin", "main", "docker", "compose", "kubectl", "get",
+    "pods", "select", "from", "where", "https", "github", "com", "localhost",
+    "export", "path", "python", "pytest", "npm", "install", "ssh", "tmux",
+]
+
+
+def _entry(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(2, 12))
+    noise = "".join(rng.choices(string.ascii_letters + string.digits, k=rng.randint(0, 40)))
+    return " ".join(words) + " " + noise
+
+
+def main() -> None:
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    rng = random.Random(0)
+    contents = [_entry(rng) for _ in range(entries)]
+
+    start = time.perf_counter()
+    keys = [fuzzy.search_key(c) for c in contents]
+    key_ms = (time.perf_counter() - start) * 1000
+    print(f"{entries} entries, search keys built in {key_ms:.1f} ms (once, at insert)")
+
+    for query in ["kubectl pods", "gpom", "xyzzy"]:
+        matcher = fuzzy.Matcher(keys)
+        worst = 0.0
+        for n in range(1, len(query) + 1):
+            start = time.perf_counter()
+            results = matcher.update(query[:n])
+            elapsed = (time.perf_counter() - start) * 1000
+            worst = max(worst, elapsed)
+            print(f"  {query[:n]!r:16} {elapsed:7.2f} ms  {len(results)} shown")
+        verdict = "ok" if worst < FRAME_MS else "SLOW"
+        print(f"  worst keystroke {worst:.2f} ms ({verdict}, frame budget {FRAME_MS} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Cost of the sensitive-content filter on large captures.
+
+Compares the single combined pass against running each pattern on its own
+in its conventional form, next to what capturing the same payload already
+costs (hashing and decoding), for prose-like and code-like text.
+
+Run: uv run python benchmarks/bench_sensitive.py [sizes in MB, e.g. 1,4,16]
+"""
+
+import random
+import re
+import string
+import sys
+import time
+
+from clippy import clipboard, sensitive
+
+
+# The obvious one-regex-per-secret list the combined pass replaces.
+NAIVE = [
+    r"-----BEGIN (?:[A-Z]+ )?PRIVATE KEY-----",
+    r"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b",
+    r"\bAIza[0-9A-Za-z_-]{35}",
+    r"\bgh[pousr]_[A-Za-z0-9]{36,}",
+    r"\bgithub_pat_[A-Za-z0-9_]{60,}",
+    r"\bglpat-[A-Za-z0-9_-]{20,}",
+    r"\bxox[abprs]-[A-Za-z0-9-]{10,}",
+    r"\b[rs]k_live_[A-Za-z0-9]{24,}",
+    r"\bsk-(?:proj-)?[A-Za-z0-9_-]{32,}",
+    r"\bgsk_[A-Za-z0-9]{40,}",
+    r"\beyJ[A-Za-z0-9_-]{10,}\.eyJ[A-Za-z0-9_-]{10,}\.[A-Za-z0-9_-]{10,}",
+    r"(?i)\b(?:password|passwd|secret(?:[_-]?key)?|api[_-]?key|access_token|auth_token)"
+    r"[\"']?\s*[:=]\s*[\"']?[^\s\"']{8,}",
+]
+
+
+def _words(rng: random.Random, count: int) -> list[str]:
+    return ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(count)]
+
+
+def prose(size: int, rng: random.Random) -> str:
+    words = _words(rng, 5000)
+    out, total = [], 0
+    while total < size:
+        sentence = " ".join(rng.choices(words, k=rng.randint(5, 20))).capitalize() + ". "
+        out.append(sentence)
+        total += len(sentence)
+    return "".join(out)[:size]
+
+
+def code(size: int, rng: random.Random) -> str:
+    names = ["_".join(rng.choices(_words(rng, 50), k=rng.randint(1, 3))) for _ in range(500)]
+    out, total = [], 0
+    while total < size:
+        a, b, c, d = rng.choices(names, k=4)
+        line = rng.choice([
+            f"    {a} = {b}.{c}({d}, key='{c}-{d}')\n",
+            f"    if {a}[{b}] == {c}:  # {d}: see {b}\n",
+            f"def {a}(self, {b}: int = 0) -> dict[str, {c}]:\n",
+            f'        "{a}": {b}_{c},\n',
+        ])
+        out.append(line)
+        total += len(line)
+    return "".join(out)[:size]
+
+
+def _ms(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    sizes = [float(s) for s in (sys.argv[1] if len(sys.argv) > 1 else "1,4,16").split(",")]
+    naive = [re.compile(p) for p in NAIVE]
+    rng = random.Random(0)
+    print(f"{'text':6} {'MB':>5} {'capture ms':>11} {'filter ms':>10} {'naive ms':>9} {'filter/capture':>15}")
+    for kind, make in (("prose", prose), ("code", code)):
+        for mb in sizes:
+            text = make(int(mb * 1024 * 1024), rng)
+            data = text.encode()
+            capture_ms = min(_ms(lambda: clipboard.capture_buffer(data, len(data))) for _ in range(3))
+            filter_ms = min(_ms(lambda: sensitive.scan(text, budget=60)) for _ in range(3))
+            assert sensitive.scan(text, budget=60) == (None, True)
+            naive_ms = _ms(lambda: [p.search(text) for p in naive])
+            print(
+                f"{kind:6} {mb:>5g} {capture_ms:>11.1f} {filter_ms:>10.1f} {naive_ms:>9.1f} "
+                f"{filter_ms / capture_ms:>14.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
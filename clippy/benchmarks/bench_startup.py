@@ -0,0 +1,107 @@
+"""Startup cost of the clippy CLI: import time and wall time per subcommand.
+
+Each command runs in a fresh interpreter against a temporary history,
+once with no daemon and once with a stand-in daemon (the real IPC server
+and cache, minus Cocoa) serving the socket. `get` and `list` go through
+the fast path in clippy.main; their overhead over a bare interpreter is
+checked against --max-overhead-ms, and the script exits 1 if any exceeds
+it, so it can gate CI.
+
+Run: uv run python benchmarks/bench_startup.py [--runs 15] [--max-overhead-ms 60]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from clippy import ipc, storage
+from clippy.cache import HistoryCache
+
+
+FAST_COMMANDS = [["get", "1"], ["list"], ["list", "--limit", "50"]]
+OTHER_COMMANDS = [["search", "item"], ["status"], ["--help"]]
+ENTRY = "from clippy.main import main; main()"
+TYPER_ENTRY = "from clippy.cli import app; app()"
+
+
+def _use_home(home: Path) -> None:
+    root = home / ".clippy"
+    root.mkdir()
+    storage.use_dir(root)
+
+
+def _wall_ms(argv: list[str], env: dict, runs: int) -> float:
+    samples = []
+    # The first run writes bytecode caches, as an installed package has.
+    for _ in range(runs + 1):
+        start = time.perf_counter()
+        subprocess.run(argv, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples[1:])
+
+
+def _import_ms(module: str, env: dict) -> float:
+    argv = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+    subprocess.run(argv, env=env, capture_output=True, check=True)
+    result = subprocess.run(argv, env=env, capture_output=True, text=True, check=True)
+    # Last line is the module itself; its cumulative column covers everything it pulled in.
+    return int(re.split(r"\s*\|\s*", result.stderr.strip().splitlines()[-1])[1]) / 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--max-overhead-ms", type=float, default=60.0)
+    args = parser.parse_args()
+
+    home = Path(tempfile.mkdtemp(prefix="clippy-startup-"))
+    _use_home(home)
+    storage.MAX_ITEMS = 1000
+    storage.import_items({"content": f"item {i}\nline two", "ts": 1.7e9 + i} for i in range(1000))
+    env = {**os.environ, "HOME": str(home)}
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+
+    base = _wall_ms([sys.executable, "-c", "pass"], env, args.runs)
+    print(f"interpreter only: {base:.1f} ms")
+    for module in ("clippy.main", "clippy.cli"):
+        print(f"import {module}: {_import_ms(module, env):.1f} ms (-X importtime)")
+
+    failures = []
+    print(f"\n{'daemon':7} {'command':22} {'entry ms':>9} {'typer ms':>9} {'overhead':>9}")
+    for daemon in (False, True):
+        server = None
+        if daemon:
+            (storage.CLIPPY_DIR / "daemon.pid").write_text(str(os.getpid()))
+            server = ipc.Server(ipc.socket_path(), ipc.history_handlers(HistoryCache(), lambda _: True))
+            server.start()
+        try:
+            for command in FAST_COMMANDS + OTHER_COMMANDS:
+                entry = _wall_ms([sys.executable, "-c", ENTRY, *command], env, args.runs)
+                typer_only = _wall_ms([sys.executable, "-c", TYPER_ENTRY, *command], env, args.runs)
+                overhead = entry - base
+                fast = command in FAST_COMMANDS
+                if fast and overhead > args.max_overhead_ms:
+                    failures.append(f"{' '.join(command)} ({'daemon' if daemon else 'no daemon'}): {overhead:.1f} ms")
+                print(
+                    f"{'yes' if daemon else 'no':7} {' '.join(command):22} {entry:>9.1f} "
+                    f"{typer_only:>9.1f} {overhead:>8.1f}{'*' if fast else ' '}"
+                )
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+    print(f"\n* fast path; overhead over a bare interpreter must stay under {args.max_overhead_ms:g} ms")
+    if failures:
+        print("Startup regression:\n  " + "\n  ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
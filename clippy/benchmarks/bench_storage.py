@@ -0,0 +1,132 @@
+"""Replay synthetic copy streams against clippy storage.
+
+Each history size runs in a fresh process and directory: history is
+prefilled to that size, then the stream is replayed through an in-memory
+clipboard backend and the same capture -> dedup -> HistoryCache.add path
+the daemon uses. No Cocoa imports, so this runs on Linux.
+
+Run: uv run python benchmarks/bench_storage.py --history-sizes 50,1000,10000
+"""
+
+import argparse
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import workload
+
+from clippy import clipboard, metrics, storage
+from clippy.cache import HistoryCache
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        f"p{int(q * 100)}": ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+        for q in (0.50, 0.95, 0.99)
+    }
+
+
+def _dir_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run(history_size: int, args: argparse.Namespace) -> dict:
+    root = Path(tempfile.mkdtemp(prefix="clippy-bench-"))
+    storage.use_dir(root)
+    storage.MAX_ITEMS = history_size
+
+    for payload in workload.copies(history_size, args.sizes, 0.0, seed=args.seed + 1):
+        storage.add_item(payload)
+    metrics.reset()
+
+    backend = clipboard.MemoryBackend()
+    clipboard.set_backend(backend)
+    cache = HistoryCache()
+    disk_before = _dir_size(root)
+    last_digest = None
+    unchanged = 0
+    latencies: list[float] = []
+
+    stream = workload.copies(args.copies, args.sizes, args.dup_ratio, args.seed)
+    for batch in workload.bursts(stream, args.burst):
+        for payload in batch:
+            backend.write(payload)
+            op_started = time.perf_counter()
+            captured = clipboard.capture()
+            if captured.digest != last_digest:
+                last_digest = captured.digest
+                cache.add(captured.content, captured.digest)
+            else:
+                unchanged += 1
+            latencies.append((time.perf_counter() - op_started) * 1000)
+        if args.burst_gap:
+            time.sleep(args.burst_gap / 1000)
+    flush_started = time.perf_counter()
+    cache.close()
+    flush_ms = (time.perf_counter() - flush_started) * 1000
+
+    read_started = time.perf_counter()
+    storage.get_items(limit=history_size)
+    list_ms = (time.perf_counter() - read_started) * 1000
+
+    snapshot = metrics.snapshot()
+    counters = snapshot["counters"]
+    # Per-op latencies end at the hand-off to the write-behind queue; the
+    # commits themselves are timed by storage.add.
+    commit = snapshot["timings_ms"].get("storage.add", {"p50": 0.0, "p99": 0.0})
+    return {
+        "history": history_size,
+        # Capture time plus the final drain; burst gaps don't dilute throughput.
+        "ops_per_sec": len(latencies) / ((sum(latencies) + flush_ms) / 1000),
+        **_percentiles(latencies),
+        "logical_mb": counters.get("storage.bytes_written", 0) / 1e6,
+        "disk_delta_mb": (_dir_size(root) - disk_before) / 1e6,
+        "dedup_skips": unchanged + counters.get("storage.dedup_skips", 0),
+        "commits": counters.get("storage.commits", 0),
+        "commit_p50": commit["p50"],
+        "commit_p99": commit["p99"],
+        "list_all_ms": list_ms,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--history-sizes", default="50,1000,10000")
+    parser.add_argument("--copies", type=int, default=2000)
+    parser.add_argument("--sizes", default="lognormal:5,1.5",
+                        help="fixed:N, uniform:LO,HI or lognormal:MU,SIGMA (bytes)")
+    parser.add_argument("--dup-ratio", type=float, default=0.2)
+    parser.add_argument("--burst", type=int, default=1, help="copies per burst")
+    parser.add_argument("--burst-gap", type=float, default=0.0, help="ms between bursts")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    workload.parse_sizes(args.sizes)
+
+    print(
+        f"{'history':>8} {'ops/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'logical MB':>11} {'disk MB':>8} {'dedup':>6} {'commits':>8} {'commit p50':>11} {'commit p99':>11} {'list ms':>8} {'rss MB':>7}"
+    )
+    for size in (int(s) for s in args.history_sizes.split(",")):
+        # A fresh process per size keeps peak RSS attributable.
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            r = pool.submit(run, size, args).result()
+        print(
+            f"{r['history']:>8} {r['ops_per_sec']:>9.0f} {r['p50']:>8.3f} {r['p95']:>8.3f} "
+            f"{r['p99']:>8.3f} {r['logical_mb']:>11.2f} {r['disk_delta_mb']:>8.2f} {r['dedup_skips']:>6} {r['commits']:>8} "
+            f"{r['commit_p50']:>11.3f} {r['commit_p99']:>11.3f} {r['list_all_ms']:>8.2f} {r['peak_rss_mb']:>7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
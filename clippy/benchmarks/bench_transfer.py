@@ -0,0 +1,51 @@
+"""Time `clippy export` / `clippy import` over a synthetic history.
+
+Run: uv run python benchmarks/bench_transfer.py [items]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import workload
+
+from clippy import archive, storage
+
+
+def _timed(label: str, fn) -> None:
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:28} {time.perf_counter() - start:>8.2f} s   {result}")
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    storage.MAX_ITEMS = count
+    work = Path(tempfile.mkdtemp(prefix="clippy-transfer-"))
+    storage.use_dir(work / "source")
+    storage.import_items(
+        {"content": payload, "ts": 1.7e9 + i}
+        for i, payload in enumerate(workload.copies(count, dup_ratio=0.0, seed=1))
+    )
+
+    for name, compress in (("history.ndjson", False), ("history.ndjson.gz", True)):
+        def export(path=work / name, compress=compress):
+            with archive.open_writer(path, compress) as out:
+                archive.dump(storage.iter_items(), out)
+            return f"{path.stat().st_size / 1e6:.1f} MB"
+
+        _timed(f"export {name}", export)
+
+    storage.use_dir(work / "target")
+
+    def load():
+        with archive.open_reader(work / "history.ndjson.gz") as lines:
+            return storage.import_items(archive.load(lines))
+
+    _timed("import into empty history", load)
+    _timed("re-import (all duplicates)", load)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Synthetic clipboard copy streams for replaying against clippy."""
+
+import functools
+import itertools
+import random
+import string
+from collections.abc import Iterator
+
+
+VOCABULARY_SIZE = 20_000
+
+
+def parse_sizes(spec: str) -> tuple[str, list[float]]:
+    """`fixed:N`, `uniform:LO,HI` or `lognormal:MU,SIGMA` (bytes)."""
+    kind, _, args = spec.partition(":")
+    if kind not in ("fixed", "uniform", "lognormal"):
+        raise ValueError(f"Unknown size distribution: {spec}")
+    return kind, [float(a) for a in args.split(",")]
+
+
+def _size(rng: random.Random, kind: str, params: list[float]) -> int:
+    if kind == "fixed":
+        return int(params[0])
+    if kind == "uniform":
+        return rng.randint(int(params[0]), int(params[1]))
+    return max(1, int(rng.lognormvariate(params[0], params[1])))
+
+
+@functools.cache
+def _vocabulary() -> tuple[list[str], list[float]]:
+    # Zipf-weighted, like real text, so the search index sees a realistic
+    # mix of common and rare terms rather than all-unique ones.
+    rng = random.Random(0)
+    words = [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10)))
+        for _ in range(VOCABULARY_SIZE)
+    ]
+    return words, list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+
+
+def _payload(rng: random.Random, size: int) -> str:
+    words, cum_weights = _vocabulary()
+    # Average word plus separator is about seven characters.
+    picked = rng.choices(words, cum_weights=cum_weights, k=size // 5 + 1)
+    return " ".join(picked)[:size]
+
+
+def copies(
+    count: int,
+    sizes: str = "lognormal:5,1.5",
+    dup_ratio: float = 0.2,
+    seed: int = 0,
+) -> Iterator[str]:
+    """Yield `count` payloads; `dup_ratio` of them repeat an earlier one,
+    half of those the immediately previous copy."""
+    rng = random.Random(seed)
+    kind, params = parse_sizes(sizes)
+    seen: list[str] = []
+    for _ in range(count):
+        if seen and rng.random() < dup_ratio:
+            payload = seen[-1] if rng.random() < 0.5 else rng.choice(seen)
+        else:
+            payload = _payload(rng, _size(rng, kind, params))
+            seen.append(payload)
+            if len(seen) > 1000:
+                seen.pop(0)
+        yield payload
+
+
+def bursts(stream: Iterator[str], burst: int) -> Iterator[list[str]]:
+    batch: list[str] = []
+    for payload in stream:
+        batch.append(payload)
+        if len(batch) == burst:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,67 @@
+import gzip
+import io
+import json
+import sys
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO
+
+from clippy.storage import HistoryItem
+
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+@contextmanager
+def open_writer(path: Path | None, compress: bool) -> Iterator[IO[str]]:
+    """Text stream to `path`, or stdout when None, gzipped if asked."""
+    raw = sys.stdout.buffer if path is None else open(path, "wb")
+    stream = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) if compress else raw
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="\n")
+    try:
+        yield text
+    finally:
+        # Detaching flushes without closing what's underneath, which may be stdout.
+        text.detach()
+        if compress:
+            stream.close()
+        if path is None:
+            raw.flush()
+        else:
+            raw.close()
+
+
+@contextmanager
+def open_reader(path: Path | None) -> Iterator[IO[str]]:
+    """Text stream from `path` or stdin; gzip is detected, not declared."""
+    raw = sys.stdin.buffer if path is None else open(path, "rb")
+    stream = gzip.GzipFile(fileobj=raw) if raw.peek(2)[:2] == GZIP_MAGIC else raw
+    try:
+        yield io.TextIOWrapper(stream, encoding="utf-8")
+    finally:
+        if path is not None:
+            raw.close()
+
+
+def dump(items: Iterable[HistoryItem], out: IO[str]) -> int:
+    count = 0
+    for item in items:
+        out.write(json.dumps({"ts": item["ts"], "content": item["content"]}, ensure_ascii=False))
+        out.write("\n")
+        count += 1
+    return count
+
+
+def load(lines: Iterable[str]) -> Iterator[HistoryItem]:
+    for n, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+            item: HistoryItem = {"content": entry["content"], "ts": float(entry["ts"])}
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"line {n}: {e}") from None
+        if not isinstance(item["content"], str):
+            raise ValueError(f"line {n}: content is not a string")
+        yield item
@@ -0,0 +1,171 @@
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from itertools import islice
+
+from clippy import display, metrics, storage
+from clippy.writer import WriteBehind
+
+
+Added = tuple[storage.HistoryItem, storage.ItemSummary]
+
+class HistoryCache:
+    """Daemon-resident hot tier holding the newest history items.
+
+    Adds land in memory under the lock and are persisted behind it by a
+    single writer thread that group-commits bursts, so capture never waits
+    on the disk. Anything that needs storage to be current (reads deeper
+    than the hot tier, search, compaction, clear) flushes the writer first.
+
+    Each hot item is kept with its summary, which is all `list` needs.
+
+    Listeners are called under that lock with each added item and its
+    summary, or with None when history changed in some other way and should
+    be reloaded.
+    """
+
+    def __init__(self) -> None:
+        self.listeners: list[Callable[[Added | None], None]] = []
+        self._lock = threading.Lock()
+        self._items: deque[storage.HistoryItem] = deque()
+        self._summaries: deque[storage.ItemSummary] = deque()
+        self._newest_digest: str | None = None
+        self._writer: WriteBehind[tuple[storage.HistoryItem, str]] = WriteBehind(
+            storage.add_items
+        )
+        self._reload()
+
+    def _reload(self) -> None:
+        size = min(storage.HOT_ITEMS, storage.MAX_ITEMS)
+        hot = storage.get_hot(size)
+        self._items = deque((item for item, _summary in hot), maxlen=size)
+        self._summaries = deque((summary for _item, summary in hot), maxlen=size)
+        self._newest_digest = storage.newest_hash()
+
+    def _complete(self) -> bool:
+        # A hot tier that isn't full holds everything storage has.
+        return len(self._items) < self._items.maxlen
+
+    def add(self, content: str, digest: str | None = None) -> storage.HistoryItem | None:
+        if not content or not content.strip():
+            return None
+        digest = digest or storage.content_hash(content)
+        with self._lock:
+            if digest == self._newest_digest:
+                metrics.incr("storage.dedup_skips")
+                return None
+            item: storage.HistoryItem = {"content": content, "ts": time.time()}
+            return self._prepend(item, digest, storage.summarize(content, digest, item["ts"]))
+
+    def add_payload(self, mime: str, data: bytes, digest: str) -> storage.HistoryItem | None:
+        """Add binary content. Its bytes go to their own file right away;
+        only a label travels through memory and the writer."""
+        if self._is_newest(digest):
+            return None
+        # Written outside the lock: an image can take a while.
+        storage.save_payload(digest, data)
+        label = display.payload_label(mime, len(data))
+        item: storage.HistoryItem = {
+            "content": label,
+            "ts": time.time(),
+            "payload": {"type": mime, "hash": digest, "size": len(data)},
+        }
+        with self._lock:
+            if digest == self._newest_digest:
+                return None
+            return self._prepend(
+                item, digest, storage.summarize(label, digest, item["ts"], mime, len(data))
+            )
+
+    def _is_newest(self, digest: str) -> bool:
+        with self._lock:
+            if digest != self._newest_digest:
+                return False
+        metrics.incr("storage.dedup_skips")
+        return True
+
+    def _prepend(
+        self, item: storage.HistoryItem, digest: str, summary: storage.ItemSummary
+    ) -> storage.HistoryItem:
+        # Called under the lock. Storage moves a re-copy to the front; mirror that here.
+        for i, hot in enumerate(self._summaries):
+            if hot["hash"] == digest:
+                del self._items[i], self._summaries[i]
+                break
+        self._newest_digest = digest
+        self._writer.put((item, digest))
+        self._items.appendleft(item)
+        self._summaries.appendleft(summary)
+        self._notify((item, summary))
+        return item
+
+    def flush(self) -> None:
+        self._writer.flush()
+
+    def items(self, limit: int) -> list[storage.HistoryItem]:
+        with self._lock:
+            if limit <= len(self._items) or self._complete():
+                return list(islice(self._items, max(limit, 0)))
+            self.flush()
+            return storage.get_items(limit=limit)
+
+    def summaries(self, limit: int) -> list[storage.ItemSummary]:
+        with self._lock:
+            if limit <= len(self._summaries) or self._complete():
+                return list(islice(self._summaries, max(limit, 0)))
+            self.flush()
+            return storage.get_summaries(limit=limit)
+
+    def by_hash(self, digest: str) -> storage.HistoryItem | None:
+        """The full item behind a summary, from memory when it is still hot."""
+        with self._lock:
+            for item, summary in zip(self._items, self._summaries):
+                if summary["hash"] == digest:
+                    return item
+            self.flush()
+            return storage.get_by_hash(digest)
+
+    def get(self, n: int) -> storage.HistoryItem | None:
+        with self._lock:
+            if 1 <= n <= len(self._items):
+                return self._items[n - 1]
+            if n < 1 or self._complete():
+                return None
+            self.flush()
+            return storage.get_item(n)
+
+    def search(self, query: str, limit: int = 10) -> list[tuple[int, storage.HistoryItem]]:
+        self.flush()
+        return storage.search(query, limit=limit)
+
+    def compact(self) -> None:
+        # Storage serialises its own writers; holding our lock for the whole
+        # compaction would stall captures.
+        self.flush()
+        if storage.compact():
+            self.reload()
+
+    def reload(self) -> None:
+        """Pick up writes made to storage by another process."""
+        with self._lock:
+            self.flush()
+            self._reload()
+            self._notify(None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.flush()
+            storage.clear_history()
+            self._items.clear()
+            self._summaries.clear()
+            self._newest_digest = None
+            self._notify(None)
+
+    def close(self) -> None:
+        """Commit anything still queued and stop the writer."""
+        self._writer.close()
+
+    def _notify(self, added: Added | None) -> None:
+        for listener in self.listeners:
+            listener(added)
@@ -1,13 +1,15 @@
+import json
 import os
 import signal
-import subprocess
 import sys
 from datetime import datetime
 from pathlib import Path
+from typing import NoReturn
 
 import typer
 
-from clippy import clipboard, storage
+from clippy import display, ipc, storage
+from clippy.main import format_item, write_content
 
 
 app = typer.Typer(help="Clipboard history manager")
@@ -29,6 +31,12 @@ def _get_daemon_pid() -> int | None:
         return None
 
 
+def _daemon_request(op: str, **args) -> dict | None:
+    if not _get_daemon_pid():
+        return None
+    return ipc.request(op, **args)
+
+
 @app.command()
 def start() -> None:
     """Start the clipboard daemon."""
@@ -36,6 +44,8 @@ def start() -> None:
         typer.echo("Daemon already running")
         raise typer.Exit(1)
 
+    import subprocess
+
     storage.ensure_dir()
 
     env = os.environ.copy()
@@ -74,51 +84,160 @@ def status() -> None:
     pid = _get_daemon_pid()
     if pid:
         typer.echo(f"Running (pid {pid})")
+        response = ipc.request("stats")
+        if response:
+            for key, value in response["stats"]["watcher"].items():
+                typer.echo(f"  {key}: {value}")
+            counters = response["stats"]["counters"]
+            if timeouts := counters.get("filter.timeouts"):
+                skipped = counters.get("filter.unscanned_skips", 0)
+                typer.echo(f"  not fully scanned: {timeouts} ({skipped} skipped)")
     else:
         typer.echo("Not running")
 
 
+@app.command()
+def stats(as_json: bool = typer.Option(False, "--json", help="Print raw JSON")) -> None:
+    """Show daemon latency percentiles and counters."""
+    response = _daemon_request("stats")
+    if response is None:
+        typer.echo("Daemon not running")
+        raise typer.Exit(1)
+
+    snapshot = response["stats"]
+    if as_json:
+        typer.echo(json.dumps(snapshot, indent=2))
+        return
+
+    typer.echo("Timings (ms)        count      p50      p95      p99      max")
+    for name, t in sorted(snapshot["timings_ms"].items()):
+        typer.echo(
+            f"  {name:18} {t['count']:>6} {t['p50']:>8.2f} {t['p95']:>8.2f} "
+            f"{t['p99']:>8.2f} {t['max']:>8.2f}"
+        )
+    typer.echo("Counters")
+    for name, value in sorted(snapshot["counters"].items()):
+        typer.echo(f"  {name:18} {value:>10}")
+    typer.echo("Watcher")
+    for name, value in snapshot["watcher"].items():
+        typer.echo(f"  {name:18} {value:>10}")
+
+
 @app.command("list")
 def list_history(limit: int = typer.Option(10, help="Number of items")) -> None:
     """List clipboard history."""
-    items = storage.get_items(limit=limit)
-    if not items:
+    response = _daemon_request("list", limit=limit)
+    summaries = response["items"] if response else storage.get_summaries(limit=limit)
+    if not summaries:
         typer.echo("No history")
         return
 
-    for i, item in enumerate(items):
-        ts = datetime.fromtimestamp(item["ts"]).strftime("%H:%M:%S")
-        content = item["content"].replace("\n", "\\n")[:60]
-        typer.echo(f"{i + 1}. [{ts}] {content}")
+    for i, summary in enumerate(summaries, start=1):
+        typer.echo(format_item(i, summary["ts"], summary["title"]))
+
+
+@app.command()
+def search(
+    query: str = typer.Argument(..., help="Words to search for"),
+    limit: int = typer.Option(10, help="Number of results"),
+) -> None:
+    """Search clipboard history, best matches first."""
+    response = _daemon_request("search", query=query, limit=limit)
+    hits = response["hits"] if response else storage.search(query, limit=limit)
+    if not hits:
+        typer.echo("No matches")
+        return
+
+    for n, item in hits:
+        typer.echo(format_item(n, item["ts"], display.title(item["content"])))
+
+
+def _invalid_index(n: int) -> NoReturn:
+    typer.echo(f"Invalid index: {n}", err=True)
+    raise typer.Exit(1)
+
+
+def _get_item(n: int) -> storage.HistoryItem:
+    response = _daemon_request("get", n=n)
+    if response is not None:
+        item = response["item"]
+    else:
+        item = storage.get_item(n)
+    if item is None:
+        _invalid_index(n)
+    return item
 
 
 @app.command()
 def get(n: int = typer.Argument(..., help="History item number (1-based)")) -> None:
     """Print history item to stdout."""
-    items = storage.get_items()
-    if n < 1 or n > len(items):
-        typer.echo(f"Invalid index: {n}", err=True)
+    if not write_content(_get_item(n)):
+        typer.echo(f"Missing data for item {n}", err=True)
         raise typer.Exit(1)
-    typer.echo(items[n - 1]["content"], nl=False)
 
 
 @app.command()
 def yank(n: int = typer.Argument(..., help="History item number (1-based)")) -> None:
     """Copy history item to clipboard."""
-    items = storage.get_items()
-    if n < 1 or n > len(items):
-        typer.echo(f"Invalid index: {n}", err=True)
-        raise typer.Exit(1)
-    clipboard.write(items[n - 1]["content"])
+    response = _daemon_request("yank", n=n)
+    if response is None:
+        from clippy import clipboard
+
+        clipboard.write_item(_get_item(n))
+    elif response["item"] is None:
+        _invalid_index(n)
     typer.echo(f"Yanked item {n} to clipboard")
 
 
 @app.command()
 def clear() -> None:
     """Clear clipboard history."""
-    storage.clear_history()
+    if _daemon_request("clear") is None:
+        storage.clear_history()
     typer.echo("History cleared")
 
 
+@app.command("export")
+def export_history(
+    path: Path | None = typer.Argument(None, help="Output file; stdout if omitted"),
+    since: datetime | None = typer.Option(None, help="Only items copied at or after this time"),
+    until: datetime | None = typer.Option(None, help="Only items copied before this time"),
+    gzip: bool = typer.Option(False, "--gzip", "-z", help="Compress (implied by a .gz path)"),
+) -> None:
+    """Write history as NDJSON, oldest first."""
+    from clippy import archive
+
+    compress = gzip or (path is not None and path.suffix == ".gz")
+    items = storage.iter_items(
+        since=since.timestamp() if since else None,
+        until=until.timestamp() if until else None,
+    )
+    with archive.open_writer(path, compress) as out:
+        count = archive.dump(items, out)
+    typer.echo(f"Exported {count} items", err=True)
+
+
+@app.command("import")
+def import_history(
+    path: Path | None = typer.Argument(None, help="NDJSON file, optionally gzipped; stdin if omitted"),
+) -> None:
+    """Append items from an export, skipping ones already in history."""
+    from clippy import archive
+
+    storage.configure()
+    try:
+        with archive.open_reader(path) as lines:
+            imported, duplicates, dropped = storage.import_items(archive.load(lines))
+    except (OSError, ValueError) as e:
+        typer.echo(f"Import failed: {e}", err=True)
+        raise typer.Exit(1)
+    # The daemon's in-memory tier doesn't see other processes' writes.
+    if imported:
+        _daemon_request("reload")
+    typer.echo(f"Imported {imported} items ({duplicates} already present)")
+    if dropped:
+        typer.echo(f"Skipped {dropped} older items beyond max_items", err=True)
+
+
 if __name__ == "__main__":
     app()
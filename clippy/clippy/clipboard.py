@@ -1,36 +1,463 @@
+import hashlib
+import os
+import shutil
 import subprocess
+import sys
+import threading
+import time
+from typing import BinaryIO, NamedTuple
 
+from clippy import storage
+from clippy.scheduler import AdaptiveInterval
 
-def read() -> str | None:
-    try:
-        result = subprocess.run(
-            ["pbpaste"], capture_output=True, text=True, check=True
-        )
-        return result.stdout if result.stdout else None
-    except subprocess.CalledProcessError:
+
+KEYCODE_V = 9
+CHUNK_SIZE = 64 * 1024
+MAX_CAPTURE_BYTES = 32 * 1024 * 1024
+# Binary types captured when the clipboard holds no text, most preferred first.
+PAYLOAD_TYPES = ("image/png", "image/tiff", "text/rtf")
+_UTIS = {"image/png": "public.png", "image/tiff": "public.tiff", "text/rtf": "public.rtf"}
+# Marker types (nspasteboard.org) a writer adds so clipboard history skips
+# the write: transient ones are intermediate, concealed ones are secrets.
+TRANSIENT_TYPES = ("org.nspasteboard.TransientType", "org.nspasteboard.ConcealedType")
+
+
+class Payload(NamedTuple):
+    type: str
+    data: bytes
+
+
+class Capture(NamedTuple):
+    # None when the payload was over the size limit and not truncated, or binary.
+    content: str | None
+    # sha256 of the full payload, whether or not content was kept.
+    digest: str
+    size: int
+    truncated: bool
+    # Set for binary content within the size limit; never truncated.
+    payload: Payload | None = None
+
+
+def _finish(
+    digest: str, kept: bytes, size: int, max_bytes: int, truncate: bool
+) -> Capture | None:
+    if size == 0:
         return None
+    if size <= max_bytes:
+        return Capture(kept.decode(errors="replace"), digest, size, False)
+    if not truncate:
+        return Capture(None, digest, size, False)
+    # A multi-byte character may straddle the cut.
+    return Capture(kept.decode(errors="ignore"), digest, size, True)
 
 
-def write(content: str) -> bool:
-    try:
-        subprocess.run(
-            ["pbcopy"], input=content, text=True, check=True
+def capture_stream(
+    stream: BinaryIO, max_bytes: int = MAX_CAPTURE_BYTES, truncate: bool = False
+) -> Capture | None:
+    """Hash a payload chunk by chunk, buffering at most `max_bytes` of it."""
+    digest = hashlib.sha256()
+    kept: list[bytes] = []
+    kept_size = size = 0
+    while chunk := stream.read(CHUNK_SIZE):
+        digest.update(chunk)
+        size += len(chunk)
+        if kept_size < max_bytes:
+            piece = chunk[: max_bytes - kept_size]
+            kept.append(piece)
+            kept_size += len(piece)
+    return _finish(digest.hexdigest(), b"".join(kept), size, max_bytes, truncate)
+
+
+def capture_buffer(
+    data: bytes | memoryview, max_bytes: int = MAX_CAPTURE_BYTES, truncate: bool = False
+) -> Capture | None:
+    view = memoryview(data)
+    digest = hashlib.sha256(view).hexdigest()
+    return _finish(digest, bytes(view[:max_bytes]), len(view), max_bytes, truncate)
+
+
+def capture_payload(
+    mime: str, data: bytes | memoryview, max_bytes: int = MAX_CAPTURE_BYTES
+) -> Capture | None:
+    view = memoryview(data)
+    if not len(view):
+        return None
+    digest = hashlib.sha256(view).hexdigest()
+    payload = Payload(mime, bytes(view)) if len(view) <= max_bytes else None
+    return Capture(None, digest, len(view), False, payload)
+
+
+class Backend:
+    """Reads, writes and pastes the system clipboard."""
+
+    def read(self) -> str | None:
+        raise NotImplementedError
+
+    def capture(self, max_bytes: int = MAX_CAPTURE_BYTES, truncate: bool = False) -> Capture | None:
+        content = self.read()
+        return capture_buffer(content.encode(), max_bytes, truncate) if content else None
+
+    def capture_binary(self, max_bytes: int = MAX_CAPTURE_BYTES) -> Capture | None:
+        """The first of PAYLOAD_TYPES on the clipboard; backends that can only
+        handle text have none."""
+        return None
+
+    def transient(self) -> bool:
+        """Whether the clipboard carries one of TRANSIENT_TYPES; backends
+        that only see text can't tell."""
+        return False
+
+    def write(self, content: str) -> bool:
+        raise NotImplementedError
+
+    def write_payload(self, payload: Payload) -> bool:
+        return False
+
+    def thumbnail(self, payload: Payload, max_px: int) -> bytes | None:
+        """PNG preview of an image payload, no side longer than `max_px`."""
+        return None
+
+    def paste(self) -> bool:
+        raise NotImplementedError
+
+
+class SubprocessBackend(Backend):
+    """pbpaste/pbcopy/osascript; slow but needs nothing beyond the OS."""
+
+    def read(self) -> str | None:
+        try:
+            result = subprocess.run(
+                ["pbpaste"], capture_output=True, text=True, check=True
+            )
+            return result.stdout if result.stdout else None
+        except subprocess.CalledProcessError:
+            return None
+
+    def capture(self, max_bytes: int = MAX_CAPTURE_BYTES, truncate: bool = False) -> Capture | None:
+        with subprocess.Popen(["pbpaste"], stdout=subprocess.PIPE) as proc:
+            captured = capture_stream(proc.stdout, max_bytes, truncate)
+        return captured if proc.returncode == 0 else None
+
+    def write(self, content: str) -> bool:
+        try:
+            subprocess.run(
+                ["pbcopy"], input=content, text=True, check=True
+            )
+            return True
+        except subprocess.CalledProcessError:
+            return False
+
+    def paste(self) -> bool:
+        try:
+            subprocess.run(
+                [
+                    "osascript", "-e",
+                    'tell application "System Events" to keystroke "v" using command down'
+                ],
+                check=True,
+                capture_output=True,
+            )
+            return True
+        except subprocess.CalledProcessError:
+            return False
+
+
+class AppKitBackend(Backend):
+    """In-process NSPasteboard access and CGEvent-posted Cmd+V."""
+
+    def __init__(self) -> None:
+        import Quartz
+        from AppKit import NSPasteboard, NSPasteboardTypeString
+        from Foundation import NSData, NSMutableData
+
+        self._quartz = Quartz
+        self._data = NSData
+        self._mutable_data = NSMutableData
+        self._pasteboard = NSPasteboard.generalPasteboard()
+        self._string_type = NSPasteboardTypeString
+
+    def read(self) -> str | None:
+        content = self._pasteboard.stringForType_(self._string_type)
+        return str(content) if content else None
+
+    def capture(self, max_bytes: int = MAX_CAPTURE_BYTES, truncate: bool = False) -> Capture | None:
+        # NSPasteboard can't report a size without handing over the data, so
+        # the whole payload is resident here however large it is; max_bytes
+        # only bounds what is kept past this call. NSData exposes its bytes as
+        # a buffer, so at least hashing and truncating don't copy them.
+        data = self._pasteboard.dataForType_(self._string_type)
+        return capture_buffer(data, max_bytes, truncate) if data else None
+
+    def capture_binary(self, max_bytes: int = MAX_CAPTURE_BYTES) -> Capture | None:
+        available = set(self._pasteboard.types() or ())
+        for mime in PAYLOAD_TYPES:
+            if _UTIS[mime] in available:
+                data = self._pasteboard.dataForType_(_UTIS[mime])
+                if data:
+                    return capture_payload(mime, data, max_bytes)
+        return None
+
+    def transient(self) -> bool:
+        available = self._pasteboard.types() or ()
+        return any(marker in available for marker in TRANSIENT_TYPES)
+
+    def write(self, content: str) -> bool:
+        self._pasteboard.clearContents()
+        return bool(self._pasteboard.setString_forType_(content, self._string_type))
+
+    def write_payload(self, payload: Payload) -> bool:
+        data = self._data.dataWithBytes_length_(payload.data, len(payload.data))
+        self._pasteboard.clearContents()
+        return bool(self._pasteboard.setData_forType_(data, _UTIS[payload.type]))
+
+    def thumbnail(self, payload: Payload, max_px: int) -> bytes | None:
+        # ImageIO decodes straight to the thumbnail size (using an embedded
+        # one when present) and is safe off the main thread, unlike NSImage.
+        q = self._quartz
+        source = q.CGImageSourceCreateWithData(
+            self._data.dataWithBytes_length_(payload.data, len(payload.data)), None
         )
+        image = source and q.CGImageSourceCreateThumbnailAtIndex(source, 0, {
+            q.kCGImageSourceCreateThumbnailFromImageAlways: True,
+            q.kCGImageSourceCreateThumbnailWithTransform: True,
+            q.kCGImageSourceThumbnailMaxPixelSize: max_px,
+        })
+        if not image:
+            return None
+        out = self._mutable_data.data()
+        dest = q.CGImageDestinationCreateWithData(out, "public.png", 1, None)
+        q.CGImageDestinationAddImage(dest, image, None)
+        return bytes(out) if q.CGImageDestinationFinalize(dest) else None
+
+    def paste(self) -> bool:
+        q = self._quartz
+        for key_down in (True, False):
+            event = q.CGEventCreateKeyboardEvent(None, KEYCODE_V, key_down)
+            q.CGEventSetFlags(event, q.kCGEventFlagMaskCommand)
+            q.CGEventPost(q.kCGHIDEventTap, event)
         return True
-    except subprocess.CalledProcessError:
-        return False
+
+
+class MemoryBackend(Backend):
+    """In-memory clipboard for tests. Thumbnails are fake: a marker naming
+    the payload and size asked for, with each call counted."""
+
+    def __init__(self, watcher: "MemoryWatcher | None" = None) -> None:
+        self.content: str | None = None
+        self.payload: Payload | None = None
+        # Marker types on the current content, as a writer declared them.
+        self.types: set[str] = set()
+        self.pastes = 0
+        self.thumbnails = 0
+        self._watcher = watcher
+
+    def read(self) -> str | None:
+        return self.content or None
+
+    def capture_binary(self, max_bytes: int = MAX_CAPTURE_BYTES) -> Capture | None:
+        if self.payload is None:
+            return None
+        return capture_payload(self.payload.type, self.payload.data, max_bytes)
+
+    def transient(self) -> bool:
+        return not self.types.isdisjoint(TRANSIENT_TYPES)
+
+    def write(self, content: str) -> bool:
+        self.content, self.payload, self.types = content, None, set()
+        if self._watcher is not None:
+            self._watcher.notify()
+        return True
+
+    def write_payload(self, payload: Payload) -> bool:
+        self.content, self.payload, self.types = None, payload, set()
+        if self._watcher is not None:
+            self._watcher.notify()
+        return True
+
+    def thumbnail(self, payload: Payload, max_px: int) -> bytes | None:
+        if not payload.type.startswith("image/"):
+            return None
+        self.thumbnails += 1
+        return f"thumbnail {payload.type} {len(payload.data)} {max_px}".encode()
+
+    def paste(self) -> bool:
+        self.pastes += 1
+        return True
+
+
+_backend: Backend | None = None
+
+
+def backend() -> Backend:
+    global _backend
+    if _backend is None:
+        try:
+            _backend = AppKitBackend()
+        except ImportError:
+            _backend = SubprocessBackend()
+    return _backend
+
+
+def set_backend(new: Backend | None) -> None:
+    global _backend
+    _backend = new
+
+
+def read() -> str | None:
+    return backend().read()
+
+
+def capture(max_bytes: int = MAX_CAPTURE_BYTES, truncate: bool = False) -> Capture | None:
+    """Text on the clipboard, or else binary content of a PAYLOAD_TYPES type."""
+    current = backend()
+    return current.capture(max_bytes, truncate) or current.capture_binary(max_bytes)
+
+
+def transient() -> bool:
+    """Whether the current clipboard content asked to stay out of history."""
+    return backend().transient()
+
+
+def write(content: str) -> bool:
+    return backend().write(content)
+
+
+def write_item(item: storage.HistoryItem) -> bool:
+    """Put a history item back: text as is, binary content from its file."""
+    ref = item.get("payload")
+    if ref is None:
+        return write(item["content"])
+    data = storage.read_payload(ref["hash"])
+    return data is not None and backend().write_payload(Payload(ref["type"], data))
+
+
+def thumbnail(payload: Payload, max_px: int) -> bytes | None:
+    return backend().thumbnail(payload, max_px)
 
 
 def simulate_paste() -> bool:
-    try:
-        subprocess.run(
-            [
-                "osascript", "-e",
-                'tell application "System Events" to keystroke "v" using command down'
-            ],
-            check=True,
-            capture_output=True,
+    return backend().paste()
+
+
+class Watcher:
+    """Signals clipboard changes so content is only read when it changed."""
+
+    def wait(self, timeout: float) -> bool:
+        """Block up to `timeout` seconds; True if the clipboard may have changed."""
+        raise NotImplementedError
+
+    def report(self, changed: bool) -> None:
+        """Tell the watcher whether the last signalled read found new content."""
+
+    def wake(self) -> None:
+        """Hint that a change is likely soon (e.g. the picker was opened)."""
+
+    def stats(self) -> dict:
+        return {"watcher": type(self).__name__}
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryWatcher(Watcher):
+    def __init__(self) -> None:
+        self._changed = threading.Event()
+
+    def notify(self) -> None:
+        self._changed.set()
+
+    def wait(self, timeout: float) -> bool:
+        if self._changed.wait(timeout):
+            self._changed.clear()
+            return True
+        return False
+
+
+class PasteboardWatcher(Watcher):
+    """Watches NSPasteboard's change counter, an in-process integer read."""
+
+    CHECK_INTERVAL = 0.1
+
+    def __init__(self) -> None:
+        from AppKit import NSPasteboard
+
+        self._pasteboard = NSPasteboard.generalPasteboard()
+        self._count = self._pasteboard.changeCount()
+
+    def wait(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            count = self._pasteboard.changeCount()
+            if count != self._count:
+                self._count = count
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.CHECK_INTERVAL, remaining))
+
+
+class CommandWatcher(Watcher):
+    """Runs a long-lived command that prints one line per clipboard change."""
+
+    def __init__(self, argv: list[str]) -> None:
+        self._changed = MemoryWatcher()
+        self._proc = subprocess.Popen(
+            argv, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
         )
+        threading.Thread(target=self._pump, daemon=True).start()
+
+    def _pump(self) -> None:
+        for _line in self._proc.stdout:
+            self._changed.notify()
+
+    def wait(self, timeout: float) -> bool:
+        return self._changed.wait(timeout)
+
+    def close(self) -> None:
+        self._proc.terminate()
+
+
+class PollingWatcher(Watcher):
+    """Fallback when nothing can signal changes: report one every interval,
+    with the interval adapting to how recently content last changed."""
+
+    def __init__(self, schedule: AdaptiveInterval | None = None) -> None:
+        self.schedule = schedule or AdaptiveInterval()
+        self._woken = threading.Event()
+        self._last_poll = time.monotonic()
+
+    def wait(self, timeout: float) -> bool:
+        # The interval, not `timeout`, decides when to poll: a timeout that runs
+        # out first only hands control back, e.g. for the daemon's shutdown check.
+        remaining = self._last_poll + self.schedule.current - time.monotonic()
+        if self._woken.wait(max(0.0, min(remaining, timeout))):
+            self._woken.clear()
+        elif remaining > timeout:
+            return False
+        self._last_poll = time.monotonic()
         return True
-    except subprocess.CalledProcessError:
-        return False
+
+    def report(self, changed: bool) -> None:
+        if changed:
+            self.schedule.on_change()
+        else:
+            self.schedule.on_idle()
+
+    def wake(self) -> None:
+        self.schedule.wake()
+        self._woken.set()
+
+    def stats(self) -> dict:
+        return {**super().stats(), **self.schedule.stats()}
+
+
+def watcher(poll_ceiling: float = 5.0) -> Watcher:
+    if sys.platform == "darwin":
+        return PasteboardWatcher()
+    if os.environ.get("WAYLAND_DISPLAY") and shutil.which("wl-paste"):
+        # wl-paste pipes each new selection into `echo`, which prints a newline.
+        return CommandWatcher(["wl-paste", "--watch", "echo"])
+    if os.environ.get("DISPLAY") and shutil.which("clipnotify"):
+        return CommandWatcher(["sh", "-c", "while clipnotify; do echo; done"])
+    return PollingWatcher(AdaptiveInterval(ceiling=poll_ceiling))
@@ -2,29 +2,106 @@ import signal
 import sys
 import threading
 import time
+from collections.abc import Callable
 
 from Cocoa import NSApplication, NSRunLoop, NSDate
 
-from clippy import clipboard, storage, hotkey, picker
+from clippy import clipboard, hotkey, ipc, metrics, picker, sensitive, storage
+from clippy.cache import Added, HistoryCache
+from clippy.menu_model import MenuModel
+from clippy.thumbnails import Thumbnailer
 
 
-POLL_INTERVAL = 0.5
+COMPACT_INTERVAL = 300
+WATCH_TIMEOUT = 1.0
 _running = True
-_last_content: str | None = None
+_last_digest: str | None = None
+_cache: HistoryCache | None = None
+_watcher: clipboard.Watcher | None = None
 
 
-def _poll_clipboard() -> None:
-    global _last_content
+def _watch_clipboard(watcher: clipboard.Watcher, max_bytes: int, truncate: bool) -> None:
+    global _last_digest
     while _running:
-        content = clipboard.read()
-        if content and content != _last_content:
-            storage.add_item(content)
-            _last_content = content
-        time.sleep(POLL_INTERVAL)
+        if not watcher.wait(WATCH_TIMEOUT):
+            continue
+        if clipboard.transient():
+            # Not read at all; whatever the writer leaves last is captured.
+            metrics.incr("capture.transient_skips")
+            watcher.report(True)
+            continue
+        started = time.perf_counter()
+        with metrics.timer("capture.read"):
+            captured = clipboard.capture(max_bytes, truncate)
+        changed = captured is not None and captured.digest != _last_digest
+        if changed:
+            _last_digest = captured.digest
+            metrics.incr("capture.bytes_read", captured.size)
+            if captured.payload is not None:
+                _add_payload(captured.payload, captured.digest, started)
+            elif captured.content is None:
+                metrics.incr("capture.oversize_skips")
+            elif sensitive.blocked(captured.content):
+                metrics.incr("capture.sensitive_skips")
+            # A truncated payload's digest doesn't describe the stored text.
+            elif _cache.add(captured.content, None if captured.truncated else captured.digest):
+                metrics.incr("capture.captures")
+                metrics.observe("capture.total", (time.perf_counter() - started) * 1000)
+        elif captured is not None:
+            metrics.incr("capture.unchanged")
+        watcher.report(changed)
+
+
+def _add_payload(payload: clipboard.Payload, digest: str, started: float) -> None:
+    # RTF is text underneath, so it gets the same secret scan; images don't.
+    if payload.type == "text/rtf" and sensitive.blocked(payload.data.decode("latin-1")):
+        metrics.incr("capture.sensitive_skips")
+    elif _cache.add_payload(payload.type, payload.data, digest):
+        metrics.incr("capture.payloads")
+        metrics.observe("capture.total", (time.perf_counter() - started) * 1000)
+
+
+def _compact_periodically() -> None:
+    while _running:
+        try:
+            _cache.compact()
+        except Exception as e:  # noqa: BLE001
+            print(f"Compaction failed: {e}", file=sys.stderr)
+        time.sleep(COMPACT_INTERVAL)
+
+
+def _on_hotkey(requested_at: float) -> None:
+    if _watcher is not None:
+        _watcher.wake()
+    picker.pick_and_paste(_cache.by_hash, requested_at)
+
+
+def _stats() -> dict:
+    return {"watcher": _watcher.stats(), **metrics.snapshot()}
+
+
+def _dump_stats_periodically(interval: float) -> None:
+    path = storage.CLIPPY_DIR / "stats.json"
+    while _running:
+        time.sleep(interval)
+        try:
+            metrics.dump(path, {"watcher": _watcher.stats()})
+        except OSError as e:
+            print(f"Stats dump failed: {e}", file=sys.stderr)
 
 
-def _on_hotkey() -> None:
-    picker.pick_and_paste()
+def _follow_history(
+    model: MenuModel, thumbnails: Thumbnailer
+) -> Callable[[Added | None], None]:
+    def on_change(added: Added | None) -> None:
+        if added is not None:
+            model.prepend(*added)
+            # Rendered on the pool now, so the picker rarely opens without it.
+            thumbnails.request(added[1])
+        else:
+            model.reset(storage.get_keyed_summaries(limit=model.capacity))
+
+    return on_change
 
 
 def _signal_handler(sig, frame):  # noqa: ARG001
@@ -34,7 +111,7 @@ def _signal_handler(sig, frame):  # noqa: ARG001
 
 
 def run() -> None:
-    global _last_content
+    global _last_digest, _cache, _watcher
 
     signal.signal(signal.SIGINT, _signal_handler)
     signal.signal(signal.SIGTERM, _signal_handler)
@@ -46,12 +123,41 @@ def run() -> None:
             file=sys.stderr,
         )
 
-    _last_content = clipboard.read()
+    storage.configure()
+    sensitive.configure()
+    daemon_config = storage.load_config().get("daemon", {})
+    max_bytes = daemon_config.get("max_capture_bytes", clipboard.MAX_CAPTURE_BYTES)
+    truncate = daemon_config.get("oversize", "skip") == "truncate"
 
-    NSApplication.sharedApplication()
+    initial = clipboard.capture(max_bytes, truncate)
+    _last_digest = initial.digest if initial else None
+    _cache = HistoryCache()
+    model = picker.load_model()
+    thumbnails = Thumbnailer()
+    _cache.listeners.append(_follow_history(model, thumbnails))
 
-    poll_thread = threading.Thread(target=_poll_clipboard, daemon=True)
-    poll_thread.start()
+    _watcher = clipboard.watcher(poll_ceiling=daemon_config.get("poll_ceiling", 5.0))
+
+    server = ipc.Server(
+        ipc.socket_path(),
+        ipc.history_handlers(_cache, clipboard.write_item, stats=_stats),
+    )
+    server.start()
+
+    NSApplication.sharedApplication()
+    picker.prepare(model, thumbnails, _cache.flush)
+
+    watch_thread = threading.Thread(
+        target=_watch_clipboard, args=(_watcher, max_bytes, truncate), daemon=True
+    )
+    watch_thread.start()
+    threading.Thread(target=_compact_periodically, daemon=True).start()
+    if daemon_config.get("stats_dump_interval"):
+        threading.Thread(
+            target=_dump_stats_periodically,
+            args=(daemon_config["stats_dump_interval"],),
+            daemon=True,
+        ).start()
 
     tap = hotkey.start_listener(_on_hotkey)
     if tap is None:
@@ -60,10 +166,18 @@ def run() -> None:
 
     print("Clippy daemon running. Press Cmd+Shift+V for history picker.")
 
-    while _running:
-        NSRunLoop.currentRunLoop().runMode_beforeDate_(
-            "kCFRunLoopDefaultMode", NSDate.dateWithTimeIntervalSinceNow_(0.5)
-        )
+    try:
+        while _running:
+            NSRunLoop.currentRunLoop().runMode_beforeDate_(
+                "kCFRunLoopDefaultMode", NSDate.dateWithTimeIntervalSinceNow_(0.5)
+            )
+            hotkey.dispatch_pending()
+    finally:
+        _watcher.close()
+        _cache.close()
+        thumbnails.close()
+        server.shutdown()
+        server.server_close()
 
 
 if __name__ == "__main__":
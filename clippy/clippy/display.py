@@ -0,0 +1,63 @@
+import re
+
+
+MAX_DISPLAY_LEN = 60
+# Kind detection only looks this far in, so huge captures cost the same.
+SNIFF_CHARS = 4096
+
+_URL = re.compile(r"[a-z][a-z0-9+.-]*://\S+", re.IGNORECASE)
+_PATH = re.compile(r"(?:~|\.\.?)?/[^\s/][^\n]*|~")
+_CODE_LINE = re.compile(
+    r"^[ \t]*(?:def |class |import |from \S+ import |function |const |let |var |return\b"
+    r"|#include|package |fn |func |pub |(?:if|for|while) ?\("
+    r"|(?:if|elif|else|for|while|try|except|with)\b[^\n]*:[ \t]*$)"
+    r"|[;{}][ \t]*$",
+    re.MULTILINE,
+)
+
+
+def title(text: str) -> str:
+    text = text.strip()
+    head = text[:MAX_DISPLAY_LEN].replace("\n", " ")
+    if len(text) > MAX_DISPLAY_LEN:
+        return head + "..."
+    return head
+
+
+def line_count(text: str) -> int:
+    return text.count("\n") + (not text.endswith("\n"))
+
+
+def kind(text: str) -> str:
+    """"url", "path", "code" or "text"; binary items are "image" or "rich"."""
+    sample = text[:SNIFF_CHARS].strip()
+    if "\n" not in sample:
+        if _URL.fullmatch(sample):
+            return "url"
+        if _PATH.fullmatch(sample):
+            return "path"
+    lines = sample.count("\n") + 1
+    hits = len(_CODE_LINE.findall(sample))
+    if hits and hits * 4 >= min(lines, 40):
+        return "code"
+    return "text"
+
+
+_PAYLOAD_NAMES = {"image/png": "PNG image", "image/tiff": "TIFF image", "text/rtf": "Rich text"}
+
+
+def format_size(size: int) -> str:
+    if size < 1024:
+        return f"{size} bytes"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def payload_kind(mime: str) -> str:
+    return "image" if mime.startswith("image/") else "rich"
+
+
+def payload_label(mime: str, size: int) -> str:
+    """Stands in for a binary item's content wherever text is shown."""
+    return f"[{_PAYLOAD_NAMES.get(mime, mime)}, {format_size(size)}]"
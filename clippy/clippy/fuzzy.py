@@ -0,0 +1,79 @@
+import heapq
+import unicodedata
+from collections.abc import Sequence
+
+
+MAX_KEY_LEN = 256
+
+
+def search_key(text: str) -> str:
+    # Slice before normalising so multi-MB entries cost the same as short ones.
+    text = text[: MAX_KEY_LEN * 2]
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.lower().split())[:MAX_KEY_LEN]
+
+
+def score(query: str, key: str) -> float | None:
+    """Score `query` as a subsequence of `key`; None when it doesn't match.
+
+    Contiguous runs and matches at word starts score higher, and an exact
+    substring beats any scattered match of the same query.
+    """
+    pos = key.find(query)
+    if pos >= 0:
+        boundary = pos == 0 or not key[pos - 1].isalnum()
+        return 3.0 * len(query) + (1.0 if boundary else 0.0) - pos * 0.001
+
+    total = 0.0
+    prev = -1
+    for ch in query:
+        idx = key.find(ch, prev + 1)
+        if idx < 0:
+            return None
+        if idx == prev + 1:
+            total += 2.0
+        elif idx == 0 or not key[idx - 1].isalnum():
+            total += 1.5
+        else:
+            total += 1.0
+        prev = idx
+    return total - prev * 0.001
+
+
+class Matcher:
+    """Incremental fuzzy filter over precomputed search keys.
+
+    Results are indices into `keys`, which are expected newest first. When
+    a query extends the previous one only the previous survivors are
+    rescored; backspacing pops back to an earlier, cached candidate set.
+    """
+
+    def __init__(self, keys: Sequence[str], limit: int = 50) -> None:
+        self.keys = keys
+        self.limit = limit
+        self._stack: list[tuple[str, dict[int, float]]] = [
+            ("", dict.fromkeys(range(len(keys)), 0.0))
+        ]
+
+    def update(self, query: str) -> list[int]:
+        query = search_key(query)
+        while len(self._stack) > 1 and not query.startswith(self._stack[-1][0]):
+            self._stack.pop()
+
+        base_query, candidates = self._stack[-1]
+        if query != base_query:
+            narrowed: dict[int, float] = {}
+            for i in candidates:
+                s = score(query, self.keys[i])
+                if s is not None:
+                    narrowed[i] = s
+            self._stack.append((query, narrowed))
+            candidates = narrowed
+
+        if not query:
+            return list(candidates)[: self.limit]
+        return heapq.nsmallest(
+            self.limit, candidates, key=lambda i: (-candidates[i], i)
+        )
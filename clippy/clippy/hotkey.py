@@ -1,11 +1,15 @@
 import ctypes
 import ctypes.util
+import queue
+import time
 from typing import Callable
 
 import Quartz
 
+from clippy import metrics
 
-HOTKEY_CALLBACK: Callable[[], None] | None = None
+
+HOTKEY_CALLBACK: Callable[[float], None] | None = None
 
 _app_services = ctypes.cdll.LoadLibrary(
     "/System/Library/Frameworks/ApplicationServices.framework/ApplicationServices"
@@ -17,23 +21,60 @@ KEYCODE_V = 9
 MODIFIER_CMD = Quartz.kCGEventFlagMaskCommand
 MODIFIER_ALT = Quartz.kCGEventFlagMaskAlternate
 REQUIRED_MODIFIERS = MODIFIER_CMD | MODIFIER_ALT
+TAP_DISABLED_EVENTS = (
+    Quartz.kCGEventTapDisabledByTimeout,
+    Quartz.kCGEventTapDisabledByUserInput,
+)
+
+_tap: Quartz.CFMachPortRef | None = None
+# Hotkey press timestamps, filled by the tap and drained on the run loop.
+_pending: queue.SimpleQueue[float] = queue.SimpleQueue()
 
 
 def _event_callback(proxy, event_type, event, refcon):  # noqa: ARG001
-    if event_type == Quartz.kCGEventKeyDown:
-        keycode = Quartz.CGEventGetIntegerValueField(
-            event, Quartz.kCGKeyboardEventKeycode
-        )
-        flags = Quartz.CGEventGetFlags(event)
-        cmd_shift = (flags & REQUIRED_MODIFIERS) == REQUIRED_MODIFIERS
-        if keycode == KEYCODE_V and cmd_shift and HOTKEY_CALLBACK:
-            HOTKEY_CALLBACK()
-            return None
-    return event
-
-
-def start_listener(callback: Callable[[], None]) -> Quartz.CFMachPortRef | None:
-    global HOTKEY_CALLBACK
+    # Runs inside the system-wide event tap: keep it to a few comparisons.
+    started = time.perf_counter()
+    try:
+        if event_type in TAP_DISABLED_EVENTS:
+            if _tap is not None:
+                Quartz.CGEventTapEnable(_tap, True)
+                metrics.incr("hotkey.tap_reenables")
+            return event
+        if event_type == Quartz.kCGEventKeyDown:
+            keycode = Quartz.CGEventGetIntegerValueField(
+                event, Quartz.kCGKeyboardEventKeycode
+            )
+            flags = Quartz.CGEventGetFlags(event)
+            cmd_shift = (flags & REQUIRED_MODIFIERS) == REQUIRED_MODIFIERS
+            if keycode == KEYCODE_V and cmd_shift and HOTKEY_CALLBACK:
+                _pending.put(started)
+                metrics.incr("hotkey.presses")
+                return None
+        return event
+    finally:
+        metrics.observe("hotkey.tap_callback", (time.perf_counter() - started) * 1000)
+
+
+def dispatch_pending() -> None:
+    """Run the hotkey callback for presses queued by the tap.
+
+    Called from the run loop after each pass, so the picker never runs
+    inside the tap. Presses queued while the picker was open collapse
+    into one.
+    """
+    requested_at = None
+    while True:
+        try:
+            requested_at = _pending.get_nowait()
+        except queue.Empty:
+            break
+    if requested_at is not None and HOTKEY_CALLBACK:
+        metrics.incr("hotkey.dispatched")
+        HOTKEY_CALLBACK(requested_at)
+
+
+def start_listener(callback: Callable[[float], None]) -> Quartz.CFMachPortRef | None:
+    global HOTKEY_CALLBACK, _tap
     HOTKEY_CALLBACK = callback
 
     mask = (1 << Quartz.kCGEventKeyDown)
@@ -54,6 +95,7 @@ def start_listener(callback: Callable[[], None]) -> Quartz.CFMachPortRef | None:
         Quartz.CFRunLoopGetCurrent(), source, Quartz.kCFRunLoopCommonModes
     )
     Quartz.CGEventTapEnable(tap, True)
+    _tap = tap
     return tap
 
 
@@ -0,0 +1,115 @@
+import json
+import os
+import socket
+import socketserver
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from clippy import storage
+
+if TYPE_CHECKING:
+    from clippy.cache import HistoryCache
+
+
+CONNECT_TIMEOUT = 1.0
+
+Handler = Callable[..., dict[str, Any]]
+
+
+def socket_path() -> Path:
+    return storage.CLIPPY_DIR / "daemon.sock"
+
+
+def _encode(message: dict[str, Any]) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        for line in self.rfile:
+            self.wfile.write(_encode(self.server.dispatch(line)))
+
+
+class Server(socketserver.ThreadingUnixStreamServer):
+    """Newline-delimited JSON over a Unix socket: one request, one reply."""
+
+    daemon_threads = True
+
+    def __init__(self, path: Path, handlers: dict[str, Handler]) -> None:
+        path.unlink(missing_ok=True)
+        self.path = path
+        self.handlers = handlers
+        super().__init__(str(path), _RequestHandler)
+        os.chmod(path, 0o600)
+
+    def dispatch(self, line: bytes) -> dict[str, Any]:
+        try:
+            request = json.loads(line)
+            handler = self.handlers[request.pop("op")]
+            return {"ok": True, **handler(**request)}
+        except Exception as e:  # noqa: BLE001
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.path.unlink(missing_ok=True)
+
+
+def history_handlers(
+    cache: "HistoryCache",
+    write_clipboard: Callable[[storage.HistoryItem], bool],
+    stats: Callable[[], dict[str, Any]] = dict,
+) -> dict[str, Handler]:
+    def list_items(limit: int = 10) -> dict[str, Any]:
+        return {"items": cache.summaries(limit)}
+
+    def get(n: int) -> dict[str, Any]:
+        return {"item": cache.get(n)}
+
+    def yank(n: int) -> dict[str, Any]:
+        item = cache.get(n)
+        return {"item": item, "written": bool(item) and write_clipboard(item)}
+
+    def search(query: str, limit: int = 10) -> dict[str, Any]:
+        return {"hits": cache.search(query, limit=limit)}
+
+    def clear() -> dict[str, Any]:
+        cache.clear()
+        return {}
+
+    return {
+        "ping": lambda: {},
+        "list": list_items,
+        "get": get,
+        "yank": yank,
+        "search": search,
+        "clear": clear,
+        "reload": lambda: cache.reload() or {},
+        "stats": lambda: {"stats": stats()},
+    }
+
+
+def request(op: str, **args: Any) -> dict[str, Any] | None:
+    """Send one request to the daemon; None if it can't be reached."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(str(socket_path()))
+            sock.sendall(_encode({"op": op, **args}))
+            with sock.makefile("rb") as f:
+                line = f.readline()
+    except OSError:
+        return None
+    if not line:
+        return None
+    response = json.loads(line)
+    if not response.pop("ok"):
+        raise RuntimeError(response["error"])
+    return response
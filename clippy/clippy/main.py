@@ -0,0 +1,82 @@
+"""Console entry point.
+
+`clippy get N` and `clippy list [--limit N]` run inside shell pipelines
+and key bindings, so they are answered here with only the daemon socket
+or SQLite loaded. Every other command, and any argument these two don't
+recognise, goes to the typer app in clippy.cli.
+"""
+
+import sys
+from datetime import datetime
+
+from clippy import ipc, storage
+
+
+def format_item(n: int, ts: float, title: str) -> str:
+    return f"{n}. [{datetime.fromtimestamp(ts).strftime('%H:%M:%S')}] {title}"
+
+
+def write_content(item: storage.HistoryItem) -> bool:
+    """Write an item to stdout; binary content goes out as is, so
+    `clippy get 1 > shot.png` works. False if its file is gone."""
+    if "payload" not in item:
+        sys.stdout.write(item["content"])
+        return True
+    data = storage.read_payload(item["payload"]["hash"])
+    if data is not None:
+        sys.stdout.flush()
+        sys.stdout.buffer.write(data)
+    return data is not None
+
+
+def _get(n: int) -> int:
+    response = ipc.request("get", n=n)
+    item = response["item"] if response is not None else storage.get_item(n)
+    if item is None:
+        print(f"Invalid index: {n}", file=sys.stderr)
+        return 1
+    if not write_content(item):
+        print(f"Missing data for item {n}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _list(limit: int) -> int:
+    response = ipc.request("list", limit=limit)
+    summaries = response["items"] if response is not None else storage.get_summaries(limit=limit)
+    if not summaries:
+        print("No history")
+    for i, summary in enumerate(summaries, start=1):
+        print(format_item(i, summary["ts"], summary["title"]))
+    return 0
+
+
+def _int(arg: str) -> int | None:
+    try:
+        return int(arg)
+    except ValueError:
+        return None
+
+
+def fast_path(argv: list[str]) -> int | None:
+    """Exit status if `argv` was handled without typer, else None."""
+    match argv:
+        case ["get", n] if (index := _int(n)) is not None:
+            return _get(index)
+        case ["list"]:
+            return _list(10)
+        case ["list", "--limit", n] if (limit := _int(n)) is not None:
+            return _list(limit)
+        case ["list", arg] if arg.startswith("--limit=") and (limit := _int(arg[8:])) is not None:
+            return _list(limit)
+    return None
+
+
+def main() -> None:
+    status = fast_path(sys.argv[1:])
+    if status is not None:
+        sys.exit(status)
+
+    from clippy.cli import app
+
+    app()
@@ -0,0 +1,141 @@
+import threading
+from collections import OrderedDict, deque
+from collections.abc import Callable
+from typing import NamedTuple
+
+from clippy import fuzzy, storage
+
+
+CHANGE_LOG_SIZE = 64
+KEEP_PAGES = 3
+
+
+class MenuEntry(NamedTuple):
+    summary: storage.ItemSummary
+    key: str
+
+    @property
+    def title(self) -> str:
+        return self.summary["title"]
+
+
+class MenuChange(NamedTuple):
+    entry: MenuEntry
+    # Where the entry was before it moved to the front; None if it is new.
+    moved_from: int | None
+
+
+class MenuModel:
+    """Ready-to-show picker entries, newest first, kept in step with history.
+
+    Every change bumps `generation`. Prepends are logged, a re-copy as the
+    removal of its old entry plus the prepend, so a view that last synced
+    at generation g can replay just those; a reset, or a view too far
+    behind, means rebuilding from `entries()`.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._entries: deque[MenuEntry] = deque(maxlen=capacity)
+        self._log: deque[tuple[int, MenuChange]] = deque(maxlen=CHANGE_LOG_SIZE)
+        self._reset_at = 0
+
+    def reset(self, keyed_summaries: list[tuple[storage.ItemSummary, str]]) -> None:
+        entries = [MenuEntry(summary, key) for summary, key in keyed_summaries]
+        with self._lock:
+            self._entries = deque(entries, maxlen=self.capacity)
+            self._log.clear()
+            self.generation += 1
+            self._reset_at = self.generation
+
+    def prepend(self, item: storage.HistoryItem, summary: storage.ItemSummary) -> None:
+        entry = MenuEntry(summary, fuzzy.search_key(item["content"]))
+        with self._lock:
+            moved = next(
+                (i for i, e in enumerate(self._entries) if e.summary["hash"] == summary["hash"]),
+                None,
+            )
+            if moved is not None:
+                del self._entries[moved]
+            self._entries.appendleft(entry)
+            self.generation += 1
+            self._log.append((self.generation, MenuChange(entry, moved)))
+
+    def entries(self) -> tuple[int, list[MenuEntry]]:
+        with self._lock:
+            return self.generation, list(self._entries)
+
+    def changes_since(self, generation: int) -> tuple[int, list[MenuChange]] | None:
+        """Changes made after `generation`, oldest first; None if the
+        caller has to rebuild."""
+        with self._lock:
+            if generation < self._reset_at:
+                return None
+            if generation == self.generation:
+                return generation, []
+            if not self._log or self._log[0][0] > generation + 1:
+                return None
+            return self.generation, [change for gen, change in self._log if gen > generation]
+
+
+class Pager:
+    """Pages of history below the picker's first screen, fetched on demand.
+
+    `fetch(limit, offset, before)` is storage.get_page. Page n starts
+    n * page_size rows down; once page n has been read, page n + 1 is
+    fetched by keyset below its last id, so deep pages cost the same as
+    shallow ones. Only the KEEP_PAGES most recently used pages are held;
+    cursors are kept for every page seen, so going back is one cheap query.
+    Page 0 is the model's own head and is never fetched here. `flush`
+    commits writes still queued behind it before any read by offset, so
+    offsets count the same items the model shows.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[..., list[tuple[int, storage.ItemSummary, str]]],
+        page_size: int,
+        flush: Callable[[], None] = lambda: None,
+    ) -> None:
+        self.page_size = page_size
+        self._fetch = fetch
+        self._flush = flush
+        self._lock = threading.Lock()
+        self._pages: OrderedDict[int, list[MenuEntry]] = OrderedDict()
+        self._cursors: dict[int, int] = {}
+
+    def page(self, n: int) -> list[MenuEntry]:
+        with self._lock:
+            if n in self._pages:
+                self._pages.move_to_end(n)
+                return self._pages[n]
+            before = self._cursors.get(n)
+            if before is None:
+                self._flush()
+            rows = self._fetch(
+                self.page_size,
+                offset=n * self.page_size if before is None else 0,
+                before=before,
+            )
+            entries = [MenuEntry(summary, key) for _id, summary, key in rows]
+            if rows:
+                self._cursors[n + 1] = rows[-1][0]
+            self._pages[n] = entries
+            while len(self._pages) > KEEP_PAGES:
+                self._pages.popitem(last=False)
+            return entries
+
+    def prefetch(self, n: int) -> None:
+        """Fetch page n off the calling thread if it isn't held already."""
+        with self._lock:
+            if n in self._pages:
+                return
+        threading.Thread(target=self.page, args=(n,), daemon=True).start()
+
+    def reset(self) -> None:
+        """Drop everything; positions moved because history changed."""
+        with self._lock:
+            self._pages.clear()
+            self._cursors.clear()
@@ -0,0 +1,74 @@
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+
+WINDOW = 1024
+
+_lock = threading.Lock()
+_counters: Counter[str] = Counter()
+_timings: dict[str, deque[float]] = {}
+
+
+def incr(name: str, n: int = 1) -> None:
+    with _lock:
+        _counters[name] += n
+
+
+def observe(name: str, ms: float) -> None:
+    with _lock:
+        samples = _timings.get(name)
+        if samples is None:
+            samples = _timings[name] = deque(maxlen=WINDOW)
+        samples.append(ms)
+
+
+@contextmanager
+def timer(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, (time.perf_counter() - started) * 1000)
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def snapshot() -> dict:
+    """Counters since start plus p50/p95/p99 over each timer's last WINDOW samples."""
+    with _lock:
+        counters = dict(_counters)
+        timings = {name: sorted(samples) for name, samples in _timings.items()}
+    return {
+        "counters": counters,
+        "timings_ms": {
+            name: {
+                "count": len(ordered),
+                "p50": round(_percentile(ordered, 0.50), 3),
+                "p95": round(_percentile(ordered, 0.95), 3),
+                "p99": round(_percentile(ordered, 0.99), 3),
+                "max": round(ordered[-1], 3),
+            }
+            for name, ordered in timings.items()
+            if ordered
+        },
+    }
+
+
+def dump(path: Path, extra: dict | None = None) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"ts": time.time(), **snapshot(), **(extra or {})}, indent=2))
+    os.replace(tmp, path)
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _timings.clear()
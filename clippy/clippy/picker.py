@@ -1,65 +1,289 @@
+import time
+from collections.abc import Callable
+
 import objc
 from Cocoa import (
     NSApplication,
+    NSImage,
+    NSMakeRect,
     NSMenu,
     NSMenuItem,
     NSEvent,
     NSObject,
+    NSSearchField,
+    NSView,
 )
 
-from clippy import clipboard, storage
+from clippy import clipboard, display, fuzzy, metrics, storage
+from clippy.menu_model import MenuEntry, MenuModel, Pager
+from clippy.thumbnails import Thumbnailer
+
+
+MAX_VISIBLE = 50
+PICKER_HISTORY = 10_000
+SEARCH_FIELD_WIDTH = 360
+_selected: str | None = None
+_menu: NSMenu | None = None
+_delegate: "MenuDelegate | None" = None
+_pager: Pager | None = None
+_thumbnails: Thumbnailer | None = None
+# Image items shown before their preview was ready, by hash.
+_awaiting_preview: dict[str, list[NSMenuItem]] = {}
+# NSMenu holds its delegate weakly; these keep the page delegates alive.
+_page_delegates: list["PageDelegate"] = []
+_synced_generation = -1
+_requested_at: float | None = None
+
+
+def _menu_item(position: int, entry: MenuEntry, target) -> NSMenuItem:
+    menu_item = NSMenuItem.alloc().initWithTitle_action_keyEquivalent_(
+        f"{position}. {entry.title}", "menuItemSelected:", ""
+    )
+    # The hash, not the content: content is only read for the item picked.
+    menu_item.setRepresentedObject_(entry.summary["hash"])
+    menu_item.setToolTip_(_describe(entry.summary))
+    menu_item.setTarget_(target)
+    menu_item.setEnabled_(True)
+    if entry.summary["kind"] == "image" and not _set_preview(menu_item, entry.summary["hash"]):
+        _awaiting_preview.setdefault(entry.summary["hash"], []).append(menu_item)
+        _thumbnails.request(entry.summary)
+    return menu_item
+
+
+def _set_preview(menu_item: NSMenuItem, digest: str) -> bool:
+    """Show the item's thumbnail if it has been rendered; never renders."""
+    path = _thumbnails.path(digest)
+    image = path and NSImage.alloc().initWithContentsOfFile_(str(path))
+    if image:
+        menu_item.setImage_(image)
+    return bool(image)
+
 
+def _fill_previews() -> None:
+    for digest, menu_items in list(_awaiting_preview.items()):
+        if _thumbnails.path(digest) is not None:
+            for menu_item in menu_items:
+                _set_preview(menu_item, digest)
+            del _awaiting_preview[digest]
 
-MAX_DISPLAY_LEN = 60
-_selected_content: str | None = None
 
+def _describe(summary: storage.ItemSummary) -> str:
+    lines = summary["lines"]
+    size = display.format_size(summary["size"])
+    return f"{summary['kind']}, {lines} line{'s' if lines != 1 else ''}, {size}"
 
-def _truncate(text: str) -> str:
-    text = text.replace("\n", " ").strip()
-    if len(text) > MAX_DISPLAY_LEN:
-        return text[:MAX_DISPLAY_LEN] + "..."
-    return text
+
+def _older_item(page: int) -> NSMenuItem:
+    """An "Older" item whose submenu is filled with `page` only when opened."""
+    delegate = PageDelegate.alloc().initWithPage_(page)
+    _page_delegates.append(delegate)
+    submenu = NSMenu.alloc().initWithTitle_("Older")
+    submenu.setAutoenablesItems_(False)
+    submenu.setDelegate_(delegate)
+    menu_item = NSMenuItem.alloc().initWithTitle_action_keyEquivalent_("Older…", None, "")
+    menu_item.setSubmenu_(submenu)
+    return menu_item
+
+
+class PageDelegate(NSObject):
+    def initWithPage_(self, page):
+        self = objc.super(PageDelegate, self).init()
+        if self is None:
+            return None
+        self.page = page
+        return self
+
+    def menuNeedsUpdate_(self, menu):
+        if menu.numberOfItems():
+            return
+        with metrics.timer("picker.page"):
+            entries = _pager.page(self.page)
+        if not entries:
+            empty = NSMenuItem.alloc().initWithTitle_action_keyEquivalent_("No older items", None, "")
+            empty.setEnabled_(False)
+            menu.addItem_(empty)
+            return
+        first = self.page * MAX_VISIBLE + 1
+        for position, entry in enumerate(entries, start=first):
+            menu.addItem_(_menu_item(position, entry, _delegate))
+        if len(entries) == MAX_VISIBLE:
+            menu.addItem_(_older_item(self.page + 1))
+            _pager.prefetch(self.page + 1)
 
 
 class MenuDelegate(NSObject):
+    def initWithMenu_model_(self, menu, model):
+        self = objc.super(MenuDelegate, self).init()
+        if self is None:
+            return None
+        self.menu = menu
+        self.model = model
+        self.field = None
+        self.entries: list[MenuEntry] = []
+        self.matcher: fuzzy.Matcher | None = None
+        self.visible: list[int] = []
+        self.filtered = False
+        return self
+
     @objc.typedSelector(b"v@:@")
     def menuItemSelected_(self, sender):
-        global _selected_content
-        _selected_content = sender.representedObject()
+        global _selected
+        _selected = sender.representedObject()
 
+    def menuWillOpen_(self, menu):  # noqa: ARG002
+        global _requested_at
+        if _requested_at is not None:
+            metrics.observe("picker.open", (time.perf_counter() - _requested_at) * 1000)
+            _requested_at = None
+        if self.field is not None and self.field.window() is not None:
+            self.field.window().makeFirstResponder_(self.field)
 
-def show_picker() -> str | None:
-    global _selected_content
-    _selected_content = None
+    def menuDidClose_(self, menu):  # noqa: ARG002
+        # Put the unfiltered view back now, off the hotkey path.
+        if self.filtered:
+            self.field.setStringValue_("")
+            self.matcher = None
+            self.filtered = False
+            _rebuild()
 
-    items = storage.get_items(limit=50)
-    if not items:
-        return None
+    def controlTextDidChange_(self, notification):
+        self.refresh(notification.object().stringValue())
+
+    def control_textView_doCommandBySelector_(self, control, text_view, selector):  # noqa: ARG002
+        global _selected
+        if selector == b"insertNewline:":
+            if self.visible:
+                _selected = self.entries[self.visible[0]].summary["hash"]
+            elif self.menu.numberOfItems() > 1:
+                _selected = self.menu.itemAtIndex_(1).representedObject()
+            self.menu.cancelTracking()
+            return True
+        return False
+
+    @objc.python_method
+    def refresh(self, query: str) -> None:
+        if self.matcher is None:
+            _generation, self.entries = self.model.entries()
+            self.matcher = fuzzy.Matcher([e.key for e in self.entries], limit=MAX_VISIBLE)
+        self.filtered = True
 
+        while self.menu.numberOfItems() > 1:
+            self.menu.removeItemAtIndex_(1)
+        self.visible = self.matcher.update(query or "")
+        for i in self.visible:
+            self.menu.addItem_(_menu_item(i + 1, self.entries[i], self))
+
+
+def _search_item(delegate: MenuDelegate) -> NSMenuItem:
+    container = NSView.alloc().initWithFrame_(NSMakeRect(0, 0, SEARCH_FIELD_WIDTH + 16, 28))
+    field = NSSearchField.alloc().initWithFrame_(NSMakeRect(8, 2, SEARCH_FIELD_WIDTH, 24))
+    field.setPlaceholderString_("Type to filter")
+    field.setDelegate_(delegate)
+    container.addSubview_(field)
+    delegate.field = field
+
+    header = NSMenuItem.alloc().initWithTitle_action_keyEquivalent_("", None, "")
+    header.setView_(container)
+    return header
+
+
+def _restart_paging() -> None:
+    """Start a fresh "Older" chain under a full first page; whatever was
+    paged in before has moved down."""
+    _pager.reset()
+    _page_delegates.clear()
+    if _menu.numberOfItems() > MAX_VISIBLE:
+        _menu.addItem_(_older_item(1))
+
+
+def _rebuild() -> None:
+    global _synced_generation
+    _awaiting_preview.clear()
+    while _menu.numberOfItems() > 1:
+        _menu.removeItemAtIndex_(1)
+    _synced_generation, entries = _delegate.model.entries()
+    for position, entry in enumerate(entries[:MAX_VISIBLE], start=1):
+        _menu.addItem_(_menu_item(position, entry, _delegate))
+    _restart_paging()
+
+
+def _sync() -> None:
+    """Bring the persistent menu up to the model's generation, replaying
+    only the changes when possible."""
+    global _synced_generation
+    changes = _delegate.model.changes_since(_synced_generation)
+    if changes is None:
+        _rebuild()
+        return
+    _synced_generation, replay = changes
+    if not replay:
+        return
+    last = _menu.numberOfItems() - 1
+    if _menu.itemAtIndex_(last).hasSubmenu():
+        _menu.removeItemAtIndex_(last)  # the "Older" item; re-added below
+    for entry, moved_from in replay:
+        # A re-copied entry still on the first screen leaves its old place.
+        if moved_from is not None and moved_from + 1 < _menu.numberOfItems():
+            _menu.removeItemAtIndex_(moved_from + 1)
+        _menu.insertItem_atIndex_(_menu_item(1, entry, _delegate), 1)
+        if _menu.numberOfItems() > MAX_VISIBLE + 1:
+            _menu.removeItemAtIndex_(MAX_VISIBLE + 1)
+    # Positions shifted; titles are cheap to renumber, items aren't rebuilt.
+    for position in range(1, _menu.numberOfItems()):
+        menu_item = _menu.itemAtIndex_(position)
+        menu_item.setTitle_(f"{position}. {menu_item.title().split('. ', 1)[1]}")
+    _restart_paging()
+
+
+def prepare(model: MenuModel, thumbnails: Thumbnailer, flush: Callable[[], None]) -> None:
+    """Build the persistent menu once; later shows only sync and display.
+
+    Only the first MAX_VISIBLE entries are menu items. Everything older
+    hangs off a chain of "Older" submenus, each filled from storage a page
+    at a time when it is opened, so the build cost doesn't grow with history.
+    Image items show a preview once `thumbnails` has rendered one. `flush`
+    commits pending writes so pages line up with the first screen.
+    """
+    global _menu, _delegate, _pager, _thumbnails
+    _pager = Pager(storage.get_page, MAX_VISIBLE, flush)
+    _thumbnails = thumbnails
     NSApplication.sharedApplication()
-    menu = NSMenu.alloc().init()
-    menu.setAutoenablesItems_(False)
+    _menu = NSMenu.alloc().init()
+    _menu.setAutoenablesItems_(False)
+    _delegate = MenuDelegate.alloc().initWithMenu_model_(_menu, model)
+    _menu.setDelegate_(_delegate)
+    _menu.addItem_(_search_item(_delegate))
+    _rebuild()
 
-    delegate = MenuDelegate.alloc().init()
 
-    for i, item in enumerate(items):
-        title = f"{i + 1}. {_truncate(item['content'])}"
-        menu_item = NSMenuItem.alloc().initWithTitle_action_keyEquivalent_(
-            title, "menuItemSelected:", ""
-        )
-        menu_item.setRepresentedObject_(item["content"])
-        menu_item.setTarget_(delegate)
-        menu_item.setEnabled_(True)
-        menu.addItem_(menu_item)
+def show_picker(requested_at: float | None = None) -> str | None:
+    """Hash of the picked item, or None."""
+    global _selected, _requested_at
+    _selected = None
+    _requested_at = requested_at
+
+    with metrics.timer("picker.sync"):
+        _sync()
+        _fill_previews()
+    if _menu.numberOfItems() <= 1:
+        return None
 
     mouse_loc = NSEvent.mouseLocation()
-    menu.popUpMenuPositioningItem_atLocation_inView_(None, mouse_loc, None)
+    _menu.popUpMenuPositioningItem_atLocation_inView_(None, mouse_loc, None)
 
-    return _selected_content
+    return _selected
 
 
-def pick_and_paste() -> None:
-    content = show_picker()
-    if content:
-        clipboard.write(content)
+def pick_and_paste(
+    load: Callable[[str], storage.HistoryItem | None], requested_at: float | None = None
+) -> None:
+    digest = show_picker(requested_at)
+    item = load(digest) if digest else None
+    if item and clipboard.write_item(item):
         clipboard.simulate_paste()
+
+
+def load_model() -> MenuModel:
+    model = MenuModel(capacity=PICKER_HISTORY)
+    model.reset(storage.get_keyed_summaries(limit=PICKER_HISTORY))
+    return model
@@ -0,0 +1,38 @@
+class AdaptiveInterval:
+    """Polling interval that backs off while idle and snaps back on activity.
+
+    Each idle tick multiplies the interval by `backoff` up to `ceiling`; a
+    detected change or an explicit wake (e.g. a hotkey press) resets it to
+    `fast`.
+    """
+
+    def __init__(self, fast: float = 0.1, ceiling: float = 5.0, backoff: float = 1.5) -> None:
+        self.fast = fast
+        self.ceiling = ceiling
+        self.backoff = backoff
+        self.current = fast
+        self.idle_ticks = 0
+        self.changes = 0
+        self.wakes = 0
+
+    def on_change(self) -> None:
+        self.current = self.fast
+        self.idle_ticks = 0
+        self.changes += 1
+
+    def on_idle(self) -> None:
+        self.idle_ticks += 1
+        self.current = min(self.current * self.backoff, self.ceiling)
+
+    def wake(self) -> None:
+        self.current = self.fast
+        self.wakes += 1
+
+    def stats(self) -> dict[str, float | int]:
+        return {
+            "interval": round(self.current, 3),
+            "ceiling": self.ceiling,
+            "idle_ticks": self.idle_ticks,
+            "changes": self.changes,
+            "wakes": self.wakes,
+        }
@@ -0,0 +1,48 @@
+import heapq
+import math
+import re
+from collections import Counter
+
+
+TOKEN_RE = re.compile(r"\w+")
+MAX_INDEXED_CHARS = 256 * 1024
+MAX_TERM_LEN = 64
+# BM25-style term frequency saturation.
+TF_SATURATION = 1.2
+
+
+def tokenize(text: str) -> Counter[str]:
+    return Counter(
+        token[:MAX_TERM_LEN]
+        for token in TOKEN_RE.findall(text[:MAX_INDEXED_CHARS].lower())
+    )
+
+
+def query_terms(query: str) -> list[str]:
+    return list(dict.fromkeys(tokenize(query)))
+
+
+def _rank_key(hit: tuple[int, float]) -> tuple[float, int]:
+    return -hit[1], -hit[0]
+
+
+def rank(
+    postings: list[dict[int, int]], total: int, limit: int | None = None
+) -> list[tuple[int, float]]:
+    """Score items matching every query term, best first.
+
+    `postings` holds one {item_id: tf} mapping per query term; ties go to
+    the newest (highest id) item.
+    """
+    if not postings or any(not p for p in postings):
+        return []
+    matched = set.intersection(*(set(p) for p in postings))
+    scores: dict[int, float] = dict.fromkeys(matched, 0.0)
+    for term_postings in postings:
+        idf = math.log(1 + total / len(term_postings))
+        for item_id in matched:
+            tf = term_postings[item_id]
+            scores[item_id] += idf * tf / (tf + TF_SATURATION)
+    if limit is None:
+        return sorted(scores.items(), key=_rank_key)
+    return heapq.nsmallest(limit, scores.items(), key=_rank_key)
@@ -0,0 +1,139 @@
+import re
+import time
+from typing import NamedTuple
+
+from clippy import metrics, storage
+
+
+# Every pattern opens on one of a few characters that are rare in ordinary
+# text ("-", "_", "A", "J", "=", ":"), with the vendor prefix checked by a
+# lookbehind. Joined into one alternation, that lets the regex engine skip
+# every other position without entering a branch, so a single pass over
+# the capture costs little more than a scan for those characters.
+PASSWORD_KEYS = (
+    "password", "passwd", "secret", "secret_key", "secretkey", "secret-key",
+    "api_key", "apikey", "api-key", "access_token", "auth_token",
+)
+
+
+def _after_key(sep: str) -> str:
+    last = "".join(sorted({c for key in PASSWORD_KEYS for c in (key[-1], key[-1].upper())}))
+    quick = f"(?<=[{last}]{sep})|(?<=[{last}][\"' ]{sep})|(?<=[{last}][\"'] {sep})"
+    full = "|".join(
+        f"(?<={key}{sep})|(?<={key}[\"' ]{sep})|(?<={key}[\"'] {sep})"
+        for key in PASSWORD_KEYS
+    )
+    # Quoted values, or bare ones that aren't a name, attribute or call.
+    bare = r"[^\s\"'.(),\[\]{};]"
+    value = (
+        rf"""[ \t]*(?:["'][^\s"']{{8,}}["']"""
+        rf"|(?=[A-Za-z_]*(?![A-Za-z_]){bare}){bare}{{8,}}+(?![.(\[]))"
+    )
+    return f"{sep}(?:{quick})(?i:{full}){value}"
+
+
+PATTERNS: dict[str, str] = {
+    "private_key": r"-----BEGIN (?:[A-Z]+ )?PRIVATE KEY-----",
+    "aws_access_key": r"A(?<=\bA)(?:KIA|SIA)[0-9A-Z]{16}\b",
+    "google_api_key": r"A(?<=\bA)Iza[0-9A-Za-z_-]{35}",
+    "github_token": r"_(?:(?<=\bgh[pousr]_)[A-Za-z0-9]{36,}|(?<=\bgithub_)pat_[A-Za-z0-9_]{60,})",
+    "gitlab_token": r"-(?<=\bglpat-)[A-Za-z0-9_-]{20,}",
+    "slack_token": r"-(?<=\bxox[abprs]-)[A-Za-z0-9-]{10,}",
+    "stripe_key": r"_(?<=\b[rs]k_)live_[A-Za-z0-9]{24,}",
+    "openai_key": r"-(?<=\bsk-)(?:proj-)?[A-Za-z0-9_-]{32,}",
+    "groq_key": r"_(?<=\bgsk_)[A-Za-z0-9]{40,}",
+    "jwt": r"J(?<=\beyJ)[A-Za-z0-9_-]{10,}\.eyJ[A-Za-z0-9_-]{10,}\.[A-Za-z0-9_-]{10,}",
+    "password_assignment": f"{_after_key('=')}|{_after_key(':')}",
+}
+
+# Scanned between deadline checks. Windows overlap by more than any
+# pattern's shortest match, so a secret straddling a boundary is found.
+# The first and last windows, where a pasted key or config line usually
+# sits, are always scanned; the budget only cuts the middle short.
+CHUNK_CHARS = 256 * 1024
+OVERLAP_CHARS = 256
+
+# Overridable from the [filter] table in config.toml.
+ENABLED = True
+BUDGET = 0.05
+# What to do with a capture the budget ran out on. The filter runs at
+# 7-30 ms/MB, several times what hashing the capture costs, so at the
+# default budget code-heavy text over ~2 MB isn't fully scanned. Such
+# copies are kept, their head and tail checked; on_timeout = "skip" drops
+# them instead, keeping unchecked text out of history at the cost of
+# losing large pastes. Either way they are counted in `clippy status`.
+SKIP_UNSCANNED = False
+
+
+class Verdict(NamedTuple):
+    # Name of the pattern that matched, if any.
+    match: str | None
+    # False when the budget ran out before the whole text was scanned.
+    complete: bool
+
+
+class Filter:
+    """All patterns compiled into one alternation for a single pass.
+
+    Any group around a branch, named or not, stops the engine from skipping
+    ahead on the opening characters, so the branches are joined bare and a
+    hit is attributed by re-matching each pattern at that one position.
+    """
+
+    def __init__(self, patterns: dict[str, str]) -> None:
+        self._combined = re.compile("|".join(patterns.values()))
+        self._each = {name: re.compile(p) for name, p in patterns.items()}
+
+    def _name(self, text: str, pos: int) -> str:
+        return next(name for name, p in self._each.items() if p.match(text, pos))
+
+    def scan(self, text: str, budget: float) -> Verdict:
+        deadline = time.perf_counter() + budget
+        # The tail window ends at the end of the text; the middle windows
+        # it already covers are left out.
+        tail = len(text) - CHUNK_CHARS - OVERLAP_CHARS
+        order = [0, *([tail] if tail > 0 else [])]
+        order += [start for start in range(CHUNK_CHARS, max(tail, 0), CHUNK_CHARS)]
+        for i, start in enumerate(order, start=1):
+            found = self._combined.search(text, start, start + CHUNK_CHARS + OVERLAP_CHARS)
+            if found:
+                return Verdict(self._name(text, found.start()), True)
+            if i >= 2 and time.perf_counter() > deadline:
+                return Verdict(None, i == len(order))
+        return Verdict(None, True)
+
+
+_filter = Filter(PATTERNS)
+
+
+def configure() -> None:
+    """Apply [filter] from config.toml; extra `patterns` should also open
+    on a literal character or the single pass loses its fast skip."""
+    global ENABLED, BUDGET, SKIP_UNSCANNED, _filter
+    config = storage.load_config().get("filter", {})
+    ENABLED = config.get("enabled", ENABLED)
+    BUDGET = config.get("budget_ms", BUDGET * 1000) / 1000
+    SKIP_UNSCANNED = config.get("on_timeout", "keep") == "skip"
+    extra = {f"custom_{i}": p for i, p in enumerate(config.get("patterns", []))}
+    _filter = Filter({**PATTERNS, **extra})
+
+
+def scan(text: str, budget: float | None = None) -> Verdict:
+    return _filter.scan(text, BUDGET if budget is None else budget)
+
+
+def blocked(text: str) -> bool:
+    """Whether a capture should stay out of history."""
+    if not ENABLED:
+        return False
+    with metrics.timer("filter.scan"):
+        verdict = scan(text)
+    if verdict.match is not None:
+        metrics.incr(f"filter.{verdict.match}")
+        return True
+    if not verdict.complete:
+        metrics.incr("filter.timeouts")
+        if SKIP_UNSCANNED:
+            metrics.incr("filter.unscanned_skips")
+        return SKIP_UNSCANNED
+    return False
@@ -1,58 +1,904 @@
-import json
+import contextlib
+import fcntl
+import functools
+import hashlib
+import sqlite3
+import threading
 import time
+import zlib
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
 from pathlib import Path
-from typing import TypedDict
+from typing import NotRequired, TypedDict
+
+from clippy import display, fuzzy, metrics, search as fts
+
+
+class PayloadRef(TypedDict):
+    type: str
+    hash: str
+    size: int
 
 
 class HistoryItem(TypedDict):
     content: str
     ts: float
+    # Binary items only: `content` is then just a label, and the bytes live
+    # in their own file under BLOB_DIR.
+    payload: NotRequired[PayloadRef]
+
+
+class ItemSummary(TypedDict):
+    """What list and the picker show, stored at insert so they never
+    read content."""
+
+    hash: str
+    ts: float
+    title: str
+    lines: int
+    size: int
+    kind: str
+    payload: str | None
 
 
 CLIPPY_DIR = Path.home() / ".clippy"
 HISTORY_FILE = CLIPPY_DIR / "history.json"
+DB_FILE = CLIPPY_DIR / "history.db"
+BLOB_DIR = CLIPPY_DIR / "blobs"
+COLD_DIR = CLIPPY_DIR / "cold"
+THUMB_DIR = CLIPPY_DIR / "thumbs"
+CONFIG_FILE = CLIPPY_DIR / "config.toml"
+LOCK_FILE = CLIPPY_DIR / "write.lock"
+BLOB_THRESHOLD = 64 * 1024
+
+# Retention, overridable from the [retention] table in config.toml.
 MAX_ITEMS = 50
+MAX_AGE_DAYS: float | None = None
+MAX_BYTES: int | None = None
+HOT_ITEMS = 50
+WARM_ITEMS = 1000
+SEGMENT_ITEMS = 256
+
+Migration = tuple[str | Callable[[sqlite3.Connection], None], ...]
+
+# Applied in order; PRAGMA user_version records how many have run.
+_MIGRATIONS: list[Migration] = [
+    (
+        """CREATE TABLE IF NOT EXISTS items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts REAL NOT NULL,
+            hash TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            content TEXT NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS items_ts ON items (ts)",
+        "CREATE INDEX IF NOT EXISTS items_hash ON items (hash)",
+        "CREATE INDEX IF NOT EXISTS items_size ON items (size)",
+    ),
+    ("ALTER TABLE items ADD COLUMN blob INTEGER NOT NULL DEFAULT 0",),
+    (
+        """CREATE TABLE IF NOT EXISTS postings (
+            term TEXT NOT NULL,
+            item_id INTEGER NOT NULL,
+            tf INTEGER NOT NULL,
+            PRIMARY KEY (term, item_id)
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS postings_item ON postings (item_id)",
+        lambda conn: _backfill_postings(conn),
+    ),
+    (
+        "ALTER TABLE items ADD COLUMN search_key TEXT NOT NULL DEFAULT ''",
+        lambda conn: _backfill_search_keys(conn),
+    ),
+    (
+        "ALTER TABLE items ADD COLUMN segment TEXT",
+        "ALTER TABLE items ADD COLUMN seg_offset INTEGER",
+        "ALTER TABLE items ADD COLUMN seg_length INTEGER",
+        "CREATE INDEX IF NOT EXISTS items_segment ON items (segment)",
+    ),
+    (
+        "CREATE TABLE IF NOT EXISTS counts (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+        "INSERT OR REPLACE INTO counts VALUES ('items', (SELECT COUNT(*) FROM items))",
+        """CREATE TRIGGER IF NOT EXISTS items_counted_insert AFTER INSERT ON items
+        BEGIN UPDATE counts SET value = value + 1 WHERE name = 'items'; END""",
+        """CREATE TRIGGER IF NOT EXISTS items_counted_delete AFTER DELETE ON items
+        BEGIN UPDATE counts SET value = value - 1 WHERE name = 'items'; END""",
+    ),
+    (
+        "ALTER TABLE items ADD COLUMN title TEXT NOT NULL DEFAULT ''",
+        "ALTER TABLE items ADD COLUMN lines INTEGER NOT NULL DEFAULT 1",
+        "ALTER TABLE items ADD COLUMN kind TEXT NOT NULL DEFAULT 'text'",
+        lambda conn: _backfill_display(conn),
+    ),
+    (
+        # History holds each content once; older copies collapse into the newest.
+        lambda conn: _delete_where(
+            conn, "id NOT IN (SELECT MAX(id) FROM items GROUP BY hash)", has_file="blob = 1"
+        ),
+        "DROP INDEX IF EXISTS items_hash",
+        "CREATE UNIQUE INDEX IF NOT EXISTS items_hash ON items (hash)",
+    ),
+    # MIME type of a binary item, whose bytes are in the blob file for its hash.
+    ("ALTER TABLE items ADD COLUMN payload TEXT",),
+]
+
+_ITEM_COLUMNS = "content, ts, hash, blob, segment, seg_offset, seg_length, payload, size"
+_SUMMARY_COLUMNS = "hash, ts, title, lines, size, kind, payload"
+# Rows that own a file under BLOB_DIR.
+_HAS_FILE = "(blob = 1 OR payload IS NOT NULL)"
+
+_local = threading.local()
+
+
+def use_dir(root: Path) -> None:
+    """Keep history, blobs, config and locks under `root` instead of
+    ~/.clippy; for tests and benchmarks."""
+    global CLIPPY_DIR, HISTORY_FILE, DB_FILE, BLOB_DIR, COLD_DIR, THUMB_DIR, CONFIG_FILE, LOCK_FILE
+    CLIPPY_DIR = root
+    HISTORY_FILE = root / "history.json"
+    DB_FILE = root / "history.db"
+    BLOB_DIR = root / "blobs"
+    COLD_DIR = root / "cold"
+    THUMB_DIR = root / "thumbs"
+    CONFIG_FILE = root / "config.toml"
+    LOCK_FILE = root / "write.lock"
 
 
 def ensure_dir() -> None:
     CLIPPY_DIR.mkdir(exist_ok=True)
 
 
-def load_history() -> list[HistoryItem]:
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def load_config() -> dict:
+    # Imported here, like json below: CLI fast paths never need either.
+    import tomllib
+
+    try:
+        with open(CONFIG_FILE, "rb") as f:
+            return tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError):
+        return {}
+
+
+def configure() -> None:
+    global MAX_ITEMS, MAX_AGE_DAYS, MAX_BYTES, HOT_ITEMS, WARM_ITEMS
+    retention = load_config().get("retention", {})
+    MAX_ITEMS = int(retention.get("max_items", MAX_ITEMS))
+    MAX_AGE_DAYS = retention.get("max_age_days", MAX_AGE_DAYS)
+    MAX_BYTES = retention.get("max_bytes", MAX_BYTES)
+    HOT_ITEMS = int(retention.get("hot_items", HOT_ITEMS))
+    WARM_ITEMS = int(retention.get("warm_items", WARM_ITEMS))
+
+
+@contextlib.contextmanager
+def write_lock() -> Iterator[None]:
+    """Serialise writers across processes.
+
+    SQLite's busy handler gives up after its timeout; a `clippy clear`
+    arriving during a long compaction should wait its turn instead.
+    """
     ensure_dir()
+    with open(LOCK_FILE, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def _connect() -> sqlite3.Connection:
+    conn: sqlite3.Connection | None = getattr(_local, "conn", None)
+    if conn is not None and _local.path == DB_FILE:
+        return conn
+    if conn is not None:
+        conn.close()
+
+    ensure_dir()
+    conn = sqlite3.connect(DB_FILE, isolation_level=None, timeout=5.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    _migrate_schema(conn)
+    _local.conn = conn
+    _local.path = DB_FILE
+    _migrate_json(conn)
+    return conn
+
+
+def _migrate_schema(conn: sqlite3.Connection) -> None:
+    if conn.execute("PRAGMA user_version").fetchone()[0] == len(_MIGRATIONS):
+        return
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for statements in _MIGRATIONS[version:]:
+            for statement in statements:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(statement)
+        conn.execute(f"PRAGMA user_version = {len(_MIGRATIONS)}")
+
+
+def _migrate_json(conn: sqlite3.Connection) -> None:
     if not HISTORY_FILE.exists():
-        return []
+        return
+    import json
+
     try:
         with open(HISTORY_FILE) as f:
-            return json.load(f)
+            legacy: list[HistoryItem] = json.load(f)
     except (json.JSONDecodeError, OSError):
-        return []
+        legacy = []
 
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        if conn.execute("SELECT 1 FROM items LIMIT 1").fetchone() is None:
+            _insert_many(conn, reversed(legacy[:MAX_ITEMS]))
+    try:
+        HISTORY_FILE.rename(HISTORY_FILE.with_suffix(".json.migrated"))
+    except FileNotFoundError:
+        pass
 
-def save_history(history: list[HistoryItem]) -> None:
-    ensure_dir()
-    tmp = HISTORY_FILE.with_suffix(".tmp")
-    with open(tmp, "w") as f:
-        json.dump(history, f)
-    tmp.rename(HISTORY_FILE)
 
+def _blob_path(digest: str) -> Path:
+    return BLOB_DIR / digest[:2] / digest
 
-def add_item(content: str) -> None:
-    if not content or not content.strip():
+
+def _write_blob(digest: str, data: bytes) -> None:
+    path = _blob_path(digest)
+    if path.exists():
         return
-    history = load_history()
-    if history and history[0]["content"] == content:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(data)
+    tmp.rename(path)
+
+
+def _read_blob(digest: str) -> str | None:
+    data = read_payload(digest)
+    return None if data is None else data.decode()
+
+
+def save_payload(digest: str, data: bytes) -> None:
+    """Write a binary payload's file; its row is added after, through add_items."""
+    _write_blob(digest, data)
+
+
+def read_payload(digest: str) -> bytes | None:
+    try:
+        return _blob_path(digest).read_bytes()
+    except OSError:
+        return None
+
+
+def thumbnail_path(digest: str) -> Path:
+    return THUMB_DIR / f"{digest}.png"
+
+
+def write_thumbnail(digest: str, png: bytes) -> None:
+    THUMB_DIR.mkdir(parents=True, exist_ok=True)
+    path = thumbnail_path(digest)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(png)
+    tmp.rename(path)
+
+
+def _segment_path(name: str) -> Path:
+    return COLD_DIR / f"{name}.z"
+
+
+def _write_segment(name: str, data: bytes) -> None:
+    COLD_DIR.mkdir(parents=True, exist_ok=True)
+    path = _segment_path(name)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(zlib.compress(data))
+    tmp.rename(path)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_segment(path: Path) -> bytes:
+    return zlib.decompress(path.read_bytes())
+
+
+def _read_segment(name: str, offset: int, length: int) -> str | None:
+    try:
+        data = _load_segment(_segment_path(name))
+    except (OSError, zlib.error):
+        return None
+    return data[offset:offset + length].decode()
+
+
+def _postings(item_id: int, content: str) -> Iterator[tuple[str, int, int]]:
+    return ((term, item_id, tf) for term, tf in fts.tokenize(content).items())
+
+
+def _index(conn: sqlite3.Connection, item_id: int, content: str) -> None:
+    conn.executemany(
+        "INSERT INTO postings (term, item_id, tf) VALUES (?, ?, ?)",
+        _postings(item_id, content),
+    )
+
+
+def _iter_contents(conn: sqlite3.Connection) -> Iterator[tuple[int, str]]:
+    # Only used by backfill migrations, which predate cold segments.
+    rows = conn.execute("SELECT id, content, hash, blob FROM items").fetchall()
+    for item_id, content, digest, blob in rows:
+        if blob:
+            content = _read_blob(digest) or ""
+        yield item_id, content
+
+
+def _backfill_postings(conn: sqlite3.Connection) -> None:
+    for item_id, content in _iter_contents(conn):
+        _index(conn, item_id, content)
+
+
+def _backfill_search_keys(conn: sqlite3.Connection) -> None:
+    for item_id, content in _iter_contents(conn):
+        conn.execute(
+            "UPDATE items SET search_key = ? WHERE id = ?",
+            (fuzzy.search_key(content), item_id),
+        )
+
+
+def _backfill_display(conn: sqlite3.Connection) -> None:
+    # Spelled out: _ITEM_COLUMNS may name columns later migrations add.
+    rows = conn.execute(
+        "SELECT id, content, ts, hash, blob, segment, seg_offset, seg_length FROM items"
+    ).fetchall()
+    for item_id, *row in rows:
+        content = (_to_item(*row) or {"content": ""})["content"]
+        conn.execute(
+            "UPDATE items SET title = ?, lines = ?, kind = ? WHERE id = ?",
+            (display.title(content), display.line_count(content), display.kind(content), item_id),
+        )
+
+
+def summarize(
+    content: str, digest: str, ts: float, payload: str | None = None, size: int | None = None
+) -> ItemSummary:
+    """Summary of a text item, or of a binary one of MIME type `payload`,
+    whose `content` is its label and whose `size` is that of its bytes."""
+    if payload is not None:
+        return {
+            "hash": digest,
+            "ts": ts,
+            "title": content,
+            "lines": 1,
+            "size": size,
+            "kind": display.payload_kind(payload),
+            "payload": payload,
+        }
+    return {
+        "hash": digest,
+        "ts": ts,
+        "title": display.title(content),
+        "lines": display.line_count(content),
+        "size": len(content.encode()),
+        "kind": display.kind(content),
+        "payload": None,
+    }
+
+
+def _insert(
+    conn: sqlite3.Connection,
+    content: str,
+    ts: float,
+    digest: str,
+    postings: list[tuple[str, int, int]] | None = None,
+    payload: PayloadRef | None = None,
+) -> None:
+    """Insert one item; its postings go to `postings` when given, for the
+    caller to write in bulk, and straight into the index otherwise.
+
+    For a binary item, `content` is its label; the bytes were already
+    written by save_payload, and `payload` says how many there are, so
+    the file is never touched inside the write transaction.
+    """
+    if payload is None:
+        data = content.encode()
+        size, stored, blob, mime = len(data), content, 0, None
+        if size > BLOB_THRESHOLD:
+            _write_blob(digest, data)
+            stored, blob = "", 1
+        title, lines, kind = display.title(content), display.line_count(content), display.kind(content)
+    else:
+        size, stored, blob, mime = payload["size"], content, 0, payload["type"]
+        title, lines, kind = content, 1, display.payload_kind(mime)
+    metrics.incr("storage.bytes_written", size)
+    cursor = conn.execute(
+        "INSERT INTO items "
+        "(ts, hash, size, content, blob, search_key, title, lines, kind, payload) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (ts, digest, size, stored, blob, fuzzy.search_key(content), title, lines, kind, mime),
+    )
+    if postings is None:
+        _index(conn, cursor.lastrowid, content)
+    else:
+        postings.extend(_postings(cursor.lastrowid, content))
+
+
+def _insert_many(conn: sqlite3.Connection, items: Iterable[HistoryItem]) -> None:
+    for item in items:
+        content = item.get("content")
+        if content:
+            _add(conn, item, content_hash(content))
+
+
+def _delete_where(
+    conn: sqlite3.Connection, where: str, params: tuple = (), has_file: str = _HAS_FILE
+) -> None:
+    # Runs inside the caller's write transaction, so no other writer can
+    # re-reference a blob or segment between the orphan check and the unlink.
+    # Migrations that run before the payload column exists pass `has_file`.
+    digests = {
+        digest
+        for (digest,) in conn.execute(
+            f"SELECT DISTINCT hash FROM items WHERE {has_file} AND {where}", params
+        )
+    }
+    segments = {
+        name
+        for (name,) in conn.execute(
+            f"SELECT DISTINCT segment FROM items WHERE segment IS NOT NULL AND {where}",
+            params,
+        )
+    }
+    conn.execute(
+        f"DELETE FROM postings WHERE item_id IN (SELECT id FROM items WHERE {where})",
+        params,
+    )
+    conn.execute(f"DELETE FROM items WHERE {where}", params)
+    for digest in digests:
+        if conn.execute(
+            f"SELECT 1 FROM items WHERE hash = ? AND {has_file} LIMIT 1", (digest,)
+        ).fetchone() is None:
+            _blob_path(digest).unlink(missing_ok=True)
+            thumbnail_path(digest).unlink(missing_ok=True)
+    for name in segments:
+        if conn.execute(
+            "SELECT 1 FROM items WHERE segment = ? LIMIT 1", (name,)
+        ).fetchone() is None:
+            _segment_path(name).unlink(missing_ok=True)
+
+
+def _count(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT value FROM counts WHERE name = 'items'").fetchone()[0]
+
+
+def _evict(conn: sqlite3.Connection) -> None:
+    # Walk from the oldest end so the cost tracks the excess, not MAX_ITEMS.
+    excess = _count(conn) - MAX_ITEMS
+    if excess <= 0:
         return
+    row = conn.execute(
+        "SELECT id FROM items ORDER BY id LIMIT 1 OFFSET ?", (excess - 1,)
+    ).fetchone()
+    _delete_where(conn, "id <= ?", (row[0],))
+
+
+def _prune(conn: sqlite3.Connection) -> None:
+    if MAX_AGE_DAYS is not None:
+        _delete_where(conn, "ts < ?", (time.time() - MAX_AGE_DAYS * 86400,))
+    if MAX_BYTES is not None:
+        row = conn.execute(
+            "SELECT id FROM (SELECT id, SUM(size) OVER (ORDER BY id DESC) AS total "
+            "FROM items) WHERE total > ? ORDER BY id DESC LIMIT 1",
+            (MAX_BYTES,),
+        ).fetchone()
+        if row is not None:
+            _delete_where(conn, "id <= ?", (row[0],))
+
+
+def _freeze_segment(conn: sqlite3.Connection) -> bool:
+    boundary = conn.execute(
+        "SELECT id FROM items ORDER BY id DESC LIMIT 1 OFFSET ?", (WARM_ITEMS,)
+    ).fetchone()
+    if boundary is None:
+        return False
+    rows = conn.execute(
+        "SELECT id, content FROM items WHERE id <= ? AND blob = 0 "
+        "AND segment IS NULL ORDER BY id LIMIT ?",
+        (boundary[0], SEGMENT_ITEMS),
+    ).fetchall()
+    if len(rows) < SEGMENT_ITEMS:
+        return False
+
+    name = f"{rows[0][0]:012d}-{rows[-1][0]:012d}"
+    chunks: list[bytes] = []
+    updates: list[tuple[str, int, int, int]] = []
+    offset = 0
+    for item_id, content in rows:
+        data = content.encode()
+        chunks.append(data)
+        updates.append((name, offset, len(data), item_id))
+        offset += len(data)
+    _write_segment(name, b"".join(chunks))
+    conn.executemany(
+        "UPDATE items SET content = '', segment = ?, seg_offset = ?, seg_length = ? "
+        "WHERE id = ?",
+        updates,
+    )
+    return True
+
+
+def compact() -> int:
+    """Apply age/size retention and move items past the warm tier into
+    compressed cold segments, one segment per write transaction.
+
+    Returns how many items retention removed.
+    """
+    conn = _connect()
+    with write_lock(), conn:
+        conn.execute("BEGIN IMMEDIATE")
+        before = _count(conn)
+        _prune(conn)
+        pruned = before - _count(conn)
+    while True:
+        with write_lock(), conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if not _freeze_segment(conn):
+                break
+    return pruned
+
+
+def load_history() -> list[HistoryItem]:
+    return get_items(limit=-1)
+
+
+def save_history(history: list[HistoryItem]) -> None:
+    conn = _connect()
+    with write_lock(), conn:
+        conn.execute("BEGIN IMMEDIATE")
+        _delete_where(conn, "1")
+        _insert_many(conn, reversed(history[:MAX_ITEMS]))
+
+
+def newest_hash() -> str | None:
+    row = _connect().execute("SELECT hash FROM items ORDER BY id DESC LIMIT 1").fetchone()
+    return None if row is None else row[0]
+
+
+def _move_to_front(conn: sqlite3.Connection, item_id: int, ts: float) -> None:
+    """Give an existing row the next id, which is what puts it first.
+
+    Content, blob or segment reference and search key stay where they are;
+    only the row's key and its postings' item ids change.
+    """
+    (seq,) = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'items'").fetchone()
+    conn.execute("UPDATE items SET id = ?, ts = ? WHERE id = ?", (seq + 1, ts, item_id))
+    conn.execute("UPDATE postings SET item_id = ? WHERE item_id = ?", (seq + 1, item_id))
+    # AUTOINCREMENT only advances on INSERT.
+    conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'items'", (seq + 1,))
+    metrics.incr("storage.moves")
+
+
+def _add(conn: sqlite3.Connection, item: HistoryItem, digest: str) -> bool:
+    row = conn.execute("SELECT id FROM items WHERE hash = ?", (digest,)).fetchone()
+    if row is None:
+        _insert(conn, item["content"], item["ts"], digest, payload=item.get("payload"))
+        return True
+    if row[0] == conn.execute("SELECT MAX(id) FROM items").fetchone()[0]:
+        metrics.incr("storage.dedup_skips")
+        return False
+    _move_to_front(conn, row[0], item["ts"])
+    return True
+
+
+def add_item(content: str, digest: str | None = None) -> HistoryItem | None:
+    """Prepend `content`; `digest` may be passed when already computed."""
+    if not content or not content.strip():
+        return None
     item: HistoryItem = {"content": content, "ts": time.time()}
-    history.insert(0, item)
-    history = history[:MAX_ITEMS]
-    save_history(history)
+    return item if add_items([(item, digest or content_hash(content))]) else None
+
+
+def add_items(entries: list[tuple[HistoryItem, str]]) -> int:
+    """Append (item, digest) pairs, oldest first, in a single transaction.
 
+    Content already in history is moved to the front with the new
+    timestamp instead of being stored again, and skipped if it is already
+    the newest item. Returns how many were inserted or moved.
+    """
+    conn = _connect()
+    with metrics.timer("storage.add"), write_lock(), conn:
+        conn.execute("BEGIN IMMEDIATE")
+        added = sum(_add(conn, item, digest) for item, digest in entries)
+        if added:
+            _evict(conn)
+    if added:
+        metrics.incr("storage.commits")
+    return added
 
-def get_items(limit: int = MAX_ITEMS) -> list[HistoryItem]:
-    return load_history()[:limit]
+
+def _write_postings(conn: sqlite3.Connection, postings: list[tuple[str, int, int]]) -> None:
+    postings.sort()
+    conn.executemany("INSERT INTO postings (term, item_id, tf) VALUES (?, ?, ?)", postings)
+    postings.clear()
+
+
+def _retention_floor(conn: sqlite3.Connection) -> float | None:
+    """Timestamp of the oldest item retention keeps once history is full."""
+    row = conn.execute(
+        "SELECT ts FROM items ORDER BY ts DESC LIMIT 1 OFFSET ?", (MAX_ITEMS - 1,)
+    ).fetchone()
+    return row and row[0]
+
+
+def _renumber_from(conn: sqlite3.Connection, ts: float) -> None:
+    """Give rows from `ts` on fresh ids in timestamp order, so that id order
+    (which listing and eviction go by) matches time order again."""
+    rows = conn.execute("SELECT id FROM items WHERE ts >= ? ORDER BY ts, id", (ts,)).fetchall()
+    (seq,) = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'items'").fetchone()
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS renumber (old INTEGER PRIMARY KEY, new INTEGER)")
+    conn.execute("DELETE FROM renumber")
+    conn.executemany(
+        "INSERT INTO renumber VALUES (?, ?)", ((old, seq + i) for i, (old,) in enumerate(rows, 1))
+    )
+    conn.execute(
+        "UPDATE items SET id = (SELECT new FROM renumber WHERE old = items.id) "
+        "WHERE id IN (SELECT old FROM renumber)"
+    )
+    conn.execute(
+        "UPDATE postings SET item_id = (SELECT new FROM renumber WHERE old = postings.item_id) "
+        "WHERE item_id IN (SELECT old FROM renumber)"
+    )
+    conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'items'", (seq + len(rows),))
+
+
+def import_items(
+    items: Iterable[HistoryItem], batch: int = 1000
+) -> tuple[int, int, int]:
+    """Merge items into history by timestamp. Content already stored with
+    the same or a later timestamp is skipped; with an earlier one, the
+    stored copy takes the imported timestamp.
+
+    Only the last MAX_ITEMS of the input can survive retention, so nothing
+    before them is inserted at all, nor is anything older than what a full
+    history already keeps. The rest is committed every `batch` items, with
+    each batch's postings written sorted by term so the index B-tree fills
+    in order rather than at random. Imported rows take ids past the newest,
+    so the last batch renumbers everything from the earliest imported
+    timestamp on, once, to put id order back in time order; until then
+    batches evict by timestamp.
+
+    Returns (imported, duplicates, dropped by retention), where imported
+    counts the items still in history afterwards.
+    """
+    import json
+
+    tail: deque[HistoryItem] = deque(maxlen=MAX_ITEMS)
+    seen = 0
+    for seen, item in enumerate(items, start=1):
+        tail.append(item)
+
+    conn = _connect()
+    (newest,) = conn.execute("SELECT MAX(ts) FROM items").fetchone()
+    duplicates = 0
+    touched: set[str] = set()
+    earliest = latest = None
+    in_order = True
+    while tail:
+        chunk = [tail.popleft() for _ in range(min(batch, len(tail)))]
+        postings: list[tuple[str, int, int]] = []
+        with write_lock(), conn:
+            conn.execute("BEGIN IMMEDIATE")
+            floor = _retention_floor(conn)
+            for item in chunk:
+                content = item.get("content")
+                digest = content_hash(content) if content else None
+                row = digest and conn.execute(
+                    "SELECT id, ts FROM items WHERE hash = ?", (digest,)
+                ).fetchone()
+                if digest is None or (row and row[1] >= item["ts"]):
+                    duplicates += 1
+                    continue
+                if floor is not None and item["ts"] < floor:
+                    continue
+                if row:
+                    # An earlier line of this import is superseded.
+                    duplicates += digest in touched
+                    # The row may be from this batch, its postings not yet written.
+                    _write_postings(conn, postings)
+                    _move_to_front(conn, row[0], item["ts"])
+                else:
+                    _insert(conn, content, item["ts"], digest, postings)
+                touched.add(digest)
+                in_order = in_order and (latest is None or item["ts"] >= latest)
+                latest = item["ts"]
+                earliest = item["ts"] if earliest is None else min(earliest, item["ts"])
+            _write_postings(conn, postings)
+            if tail:
+                # Ids are out of time order until the renumbering below, so
+                # _evict, which goes by id, has to wait for it.
+                if (floor := _retention_floor(conn)) is not None:
+                    _delete_where(conn, "ts < ?", (floor,))
+            else:
+                if earliest is not None and (not in_order or (newest is not None and earliest < newest)):
+                    _renumber_from(conn, earliest)
+                _evict(conn)
+
+    (imported,) = conn.execute(
+        "SELECT COUNT(*) FROM items WHERE hash IN (SELECT value FROM json_each(?))",
+        (json.dumps(list(touched)),),
+    ).fetchone()
+    return imported, duplicates, seen - imported - duplicates
+
+
+def _to_item(
+    content: str,
+    ts: float,
+    digest: str,
+    blob: int,
+    segment: str | None,
+    seg_offset: int | None,
+    seg_length: int | None,
+    payload: str | None = None,
+    size: int | None = None,
+) -> HistoryItem | None:
+    if blob:
+        content = _read_blob(digest)
+    elif segment is not None:
+        content = _read_segment(segment, seg_offset, seg_length)
+    if content is None:
+        return None
+    if payload is not None:
+        return {
+            "content": content,
+            "ts": ts,
+            "payload": {"type": payload, "hash": digest, "size": size},
+        }
+    return {"content": content, "ts": ts}
+
+
+def get_items(limit: int | None = None) -> list[HistoryItem]:
+    rows = _connect().execute(
+        f"SELECT {_ITEM_COLUMNS} FROM items ORDER BY id DESC LIMIT ?",
+        (MAX_ITEMS if limit is None else limit,),
+    ).fetchall()
+    return [item for row in rows if (item := _to_item(*row)) is not None]
+
+
+def get_item(n: int) -> HistoryItem | None:
+    if n < 1:
+        return None
+    row = _connect().execute(
+        f"SELECT {_ITEM_COLUMNS} FROM items ORDER BY id DESC LIMIT 1 OFFSET ?",
+        (n - 1,),
+    ).fetchone()
+    return None if row is None else _to_item(*row)
+
+
+def _to_summary(row: tuple) -> ItemSummary:
+    digest, ts, title, lines, size, kind, payload = row
+    return {
+        "hash": digest,
+        "ts": ts,
+        "title": title,
+        "lines": lines,
+        "size": size,
+        "kind": kind,
+        "payload": payload,
+    }
+
+
+def get_summaries(limit: int | None = None) -> list[ItemSummary]:
+    rows = _connect().execute(
+        f"SELECT {_SUMMARY_COLUMNS} FROM items ORDER BY id DESC LIMIT ?",
+        (MAX_ITEMS if limit is None else limit,),
+    ).fetchall()
+    return [_to_summary(row) for row in rows]
+
+
+def get_hot(limit: int) -> list[tuple[HistoryItem, ItemSummary]]:
+    """Items with their summaries, newest first, read in one statement so
+    the two always agree."""
+    rows = _connect().execute(
+        f"SELECT {_ITEM_COLUMNS}, {_SUMMARY_COLUMNS} FROM items ORDER BY id DESC LIMIT ?",
+        (limit,),
+    ).fetchall()
+    return [
+        (item, _to_summary(row[9:]))
+        for row in rows
+        if (item := _to_item(*row[:9])) is not None
+    ]
+
+
+def get_keyed_summaries(limit: int | None = None) -> list[tuple[ItemSummary, str]]:
+    """Summaries newest first, each with the fuzzy search key computed at insert."""
+    rows = _connect().execute(
+        f"SELECT {_SUMMARY_COLUMNS}, search_key FROM items ORDER BY id DESC LIMIT ?",
+        (MAX_ITEMS if limit is None else limit,),
+    ).fetchall()
+    return [(_to_summary(row), key) for *row, key in rows]
+
+
+def get_page(
+    limit: int, offset: int = 0, before: int | None = None
+) -> list[tuple[int, ItemSummary, str]]:
+    """(id, summary, search key) rows newest first, starting below id `before`
+    when given, else `offset` rows down. The last id is the next page's cursor."""
+    if before is None:
+        sql, params = "ORDER BY id DESC LIMIT ? OFFSET ?", (limit, offset)
+    else:
+        sql, params = "WHERE id < ? ORDER BY id DESC LIMIT ?", (before, limit)
+    rows = _connect().execute(
+        f"SELECT id, {_SUMMARY_COLUMNS}, search_key FROM items {sql}", params
+    ).fetchall()
+    return [(item_id, _to_summary(row), key) for item_id, *row, key in rows]
+
+
+def get_by_hash(digest: str) -> HistoryItem | None:
+    """The full item behind a summary, read only when it is used."""
+    row = _connect().execute(
+        f"SELECT {_ITEM_COLUMNS} FROM items WHERE hash = ?", (digest,)
+    ).fetchone()
+    return None if row is None else _to_item(*row)
+
+
+def iter_items(
+    since: float | None = None, until: float | None = None, batch: int = 500
+) -> Iterator[HistoryItem]:
+    """Text items oldest first with `since <= ts < until`, fetched `batch`
+    rows at a time by id so nothing holds the whole history."""
+    conn = _connect()
+    where, params = "id > ? AND payload IS NULL", [0]
+    if since is not None:
+        where += " AND ts >= ?"
+        params.append(since)
+    if until is not None:
+        where += " AND ts < ?"
+        params.append(until)
+    while True:
+        rows = conn.execute(
+            f"SELECT id, {_ITEM_COLUMNS} FROM items WHERE {where} ORDER BY id LIMIT ?",
+            (*params, batch),
+        ).fetchall()
+        for _id, *row in rows:
+            if (item := _to_item(*row)) is not None:
+                yield item
+        if len(rows) < batch:
+            return
+        params[0] = rows[-1][0]
+
+
+def search(query: str, limit: int = 10) -> list[tuple[int, HistoryItem]]:
+    """Return (1-based history position, item) pairs ranked by relevance."""
+    terms = fts.query_terms(query)
+    if not terms:
+        return []
+    conn = _connect()
+    postings: list[dict[int, int]] = []
+    for term in terms[:-1]:
+        rows = conn.execute(
+            "SELECT item_id, tf FROM postings WHERE term = ?", (term,)
+        ).fetchall()
+        postings.append(dict(rows))
+    # Prefix match the last word so it can still be half-typed.
+    rows = conn.execute(
+        "SELECT item_id, SUM(tf) FROM postings WHERE term >= ? AND term < ? "
+        "GROUP BY item_id",
+        (terms[-1], terms[-1] + "\U0010ffff"),
+    ).fetchall()
+    postings.append(dict(rows))
+    total = _count(conn)
+
+    hits: list[tuple[int, HistoryItem]] = []
+    for item_id, _score in fts.rank(postings, total, limit):
+        row = conn.execute(
+            f"SELECT {_ITEM_COLUMNS} FROM items WHERE id = ?", (item_id,)
+        ).fetchone()
+        if row is None or (item := _to_item(*row)) is None:
+            continue
+        position = conn.execute(
+            "SELECT COUNT(*) FROM items WHERE id >= ?", (item_id,)
+        ).fetchone()[0]
+        hits.append((position, item))
+    return hits
 
 
 def clear_history() -> None:
-    ensure_dir()
-    save_history([])
+    conn = _connect()
+    with write_lock(), conn:
+        conn.execute("BEGIN IMMEDIATE")
+        _delete_where(conn, "1")
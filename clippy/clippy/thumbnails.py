@@ -0,0 +1,54 @@
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from clippy import clipboard, metrics, storage
+
+
+THUMBNAIL_PX = 64
+WORKERS = 2
+
+
+class Thumbnailer:
+    """Renders image previews on a small worker pool, each at most once.
+
+    Callers only ever look for a finished file or ask for one to be made,
+    so decoding an image never happens on the thread that asked. A preview
+    that failed is not retried.
+    """
+
+    def __init__(self, workers: int = WORKERS) -> None:
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+        self._lock = threading.Lock()
+        self._requested: set[str] = set()
+
+    def path(self, digest: str) -> Path | None:
+        path = storage.thumbnail_path(digest)
+        return path if path.exists() else None
+
+    def request(self, summary: storage.ItemSummary) -> None:
+        """Queue a preview for an image item that has none yet."""
+        if summary["kind"] != "image" or self.path(summary["hash"]) is not None:
+            return
+        with self._lock:
+            if summary["hash"] in self._requested:
+                return
+            self._requested.add(summary["hash"])
+        self._pool.submit(self._render, summary["payload"], summary["hash"])
+
+    def _render(self, mime: str, digest: str) -> None:
+        try:
+            data = storage.read_payload(digest)
+            with metrics.timer("thumbnail.render"):
+                png = data and clipboard.thumbnail(clipboard.Payload(mime, data), THUMBNAIL_PX)
+            if png:
+                storage.write_thumbnail(digest, png)
+            else:
+                metrics.incr("thumbnail.failures")
+        except Exception as e:  # noqa: BLE001
+            metrics.incr("thumbnail.failures")
+            print(f"Thumbnail failed: {e}", file=sys.stderr)
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
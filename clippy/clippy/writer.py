@@ -0,0 +1,84 @@
+import queue
+import sys
+import threading
+import time
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+from clippy import metrics
+
+
+T = TypeVar("T")
+
+MAX_PENDING = 1024
+MAX_BATCH = 256
+# How long the writer waits after the first queued entry for a burst to
+# fill the same commit.
+LINGER = 0.05
+
+
+class WriteBehind(Generic[T]):
+    """One writer thread committing queued entries in groups.
+
+    Everything queued while a commit is running, or within `linger` of the
+    first entry, goes to `commit` as one batch, so a burst of copies costs
+    one transaction. The queue is bounded: when the disk can't keep up,
+    `put` blocks rather than dropping history.
+    """
+
+    def __init__(
+        self,
+        commit: Callable[[list[T]], object],
+        max_pending: int = MAX_PENDING,
+        max_batch: int = MAX_BATCH,
+        linger: float = LINGER,
+    ) -> None:
+        self._commit = commit
+        self._queue: queue.Queue[T | None] = queue.Queue(max_pending)
+        self.max_batch = max_batch
+        self.linger = linger
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, entry: T) -> None:
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            metrics.incr("writer.backpressure")
+            self._queue.put(entry)
+
+    def flush(self) -> None:
+        """Block until everything queued so far has been committed."""
+        self._queue.join()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _take(self) -> list[T | None]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.max_batch and batch[-1] is not None:
+            try:
+                batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take()
+            entries = [e for e in batch if e is not None]
+            try:
+                if entries:
+                    self._commit(entries)
+                    metrics.incr("writer.batches")
+                    metrics.incr("writer.entries", len(entries))
+            except Exception as e:  # noqa: BLE001
+                metrics.incr("writer.errors")
+                print(f"History write failed: {e}", file=sys.stderr)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if len(entries) < len(batch):
+                return
@@ -0,0 +1,15 @@
+import pytest
+
+from clippy import cli, clipboard, storage
+
+
+@pytest.fixture(autouse=True)
+def clippy_dir(tmp_path, monkeypatch):
+    home = storage.CLIPPY_DIR
+    storage.use_dir(tmp_path)
+    for name in ("MAX_ITEMS", "MAX_AGE_DAYS", "MAX_BYTES", "HOT_ITEMS", "WARM_ITEMS"):
+        monkeypatch.setattr(storage, name, getattr(storage, name))
+    monkeypatch.setattr(cli, "PID_FILE", tmp_path / "daemon.pid")
+    monkeypatch.setattr(clipboard, "_backend", clipboard.MemoryBackend())
+    yield tmp_path
+    storage.use_dir(home)
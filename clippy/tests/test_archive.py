@@ -0,0 +1,122 @@
+import gzip
+from datetime import datetime
+
+import pytest
+from typer.testing import CliRunner
+
+from clippy import archive, cli, storage
+
+
+runner = CliRunner()
+
+
+def _seed(*stamps: float) -> None:
+    storage.import_items({"content": f"item {ts!r}", "ts": ts} for ts in stamps)
+
+
+def _contents() -> list[str]:
+    return [i["content"] for i in storage.iter_items()]
+
+
+@pytest.mark.parametrize("name", ["history.ndjson", "history.ndjson.gz"])
+def test_round_trip(clippy_dir, name):
+    _seed(1, 2, 3)
+    path = clippy_dir / name
+    assert runner.invoke(cli.app, ["export", str(path)]).exit_code == 0
+    assert (path.read_bytes()[:2] == archive.GZIP_MAGIC) == name.endswith(".gz")
+
+    storage.clear_history()
+    result = runner.invoke(cli.app, ["import", str(path)])
+    assert result.exit_code == 0
+    assert "Imported 3 items (0 already present)" in result.output
+    assert _contents() == ["item 1", "item 2", "item 3"]
+
+
+def test_import_skips_existing_entries(clippy_dir):
+    _seed(1, 2, 3)
+    path = clippy_dir / "h.ndjson"
+    path.write_text(
+        '{"ts": 2, "content": "item 2"}\n\n{"ts": 5, "content": "item 2"}\n'
+    )
+    assert storage.import_items(archive.load(path.open())) == (1, 1, 0)
+    # A later copy of stored content moves it to the front rather than repeating it.
+    assert [(i["content"], i["ts"]) for i in storage.iter_items()] == [
+        ("item 1", 1), ("item 3", 3), ("item 2", 5)
+    ]
+
+
+def test_export_filters_by_time(clippy_dir):
+    base = datetime(2024, 1, 1).timestamp()
+    _seed(base - 60, base, base + 60)
+    result = runner.invoke(
+        cli.app,
+        ["export", "--since", "2024-01-01", "--until", "2024-01-01T00:00:30"],
+    )
+    assert result.stdout.splitlines() == [f'{{"ts": {base}, "content": "item {base!r}"}}']
+
+
+def test_iter_items_pages_through_history():
+    _seed(*range(1, 8))
+    assert [i["ts"] for i in storage.iter_items(batch=3)] == list(range(1, 8))
+
+
+def test_import_only_inserts_what_retention_keeps(monkeypatch):
+    monkeypatch.setattr(storage, "MAX_ITEMS", 3)
+    result = storage.import_items({"content": f"x{i}", "ts": i} for i in range(10))
+    assert result == (3, 0, 7)
+    assert _contents() == ["x7", "x8", "x9"]
+
+
+def test_import_into_full_history_keeps_newest_by_time(monkeypatch):
+    monkeypatch.setattr(storage, "MAX_ITEMS", 3)
+    _seed(100, 101, 102)
+    # An older backup cannot displace anything newer.
+    assert storage.import_items({"content": f"old{i}", "ts": i} for i in (1, 2, 3)) == (0, 0, 3)
+    assert _contents() == ["item 100", "item 101", "item 102"]
+
+
+def test_import_interleaves_by_time(monkeypatch):
+    monkeypatch.setattr(storage, "MAX_ITEMS", 4)
+    _seed(10, 20, 30)
+    items = [
+        {"content": "apple", "ts": 15},
+        {"content": "apple", "ts": 25},
+        {"content": "banana", "ts": 5},
+    ]
+    # The second apple supersedes the first; banana is older than all that fits.
+    assert storage.import_items(items) == (1, 1, 1)
+    assert _contents() == ["item 10", "item 20", "apple", "item 30"]
+    assert [(n, item["ts"]) for n, item in storage.search("apple")] == [(2, 25)]
+
+
+def test_import_in_batches_renumbers_once(monkeypatch):
+    monkeypatch.setattr(storage, "MAX_ITEMS", 5)
+    _seed(10, 20, 30)
+    renumbered = []
+    renumber = storage._renumber_from
+
+    def spy(conn, ts):
+        renumbered.append(ts)
+        renumber(conn, ts)
+
+    monkeypatch.setattr(storage, "_renumber_from", spy)
+    items = [{"content": f"new {ts}", "ts": ts} for ts in (5, 15, 25, 35, 45)]
+    assert storage.import_items(items, batch=2) == (3, 0, 2)
+    assert renumbered == [5]
+    assert _contents() == ["item 20", "new 25", "item 30", "new 35", "new 45"]
+    assert [n for n, _ in storage.search("new")] == [1, 2, 4]
+
+
+def test_gzip_is_detected_on_import(clippy_dir):
+    path = clippy_dir / "no-suffix"
+    path.write_bytes(gzip.compress(b'{"ts": 1, "content": "zipped"}\n'))
+    assert runner.invoke(cli.app, ["import", str(path)]).exit_code == 0
+    assert _contents() == ["zipped"]
+
+
+def test_malformed_line_is_reported(clippy_dir):
+    path = clippy_dir / "bad.ndjson"
+    path.write_text('{"ts": 1, "content": "ok"}\n{"ts": 2}\n')
+    result = runner.invoke(cli.app, ["import", str(path)])
+    assert result.exit_code == 1
+    assert "line 2" in result.output
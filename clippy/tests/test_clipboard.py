@@ -0,0 +1,113 @@
+import io
+import sys
+import threading
+import time
+
+from clippy import clipboard, storage
+from clippy.scheduler import AdaptiveInterval
+
+
+class TestBackends:
+    def test_module_functions_use_active_backend(self):
+        clipboard.write("hello")
+        assert clipboard.read() == "hello"
+        assert clipboard.simulate_paste() is True
+        assert clipboard.backend().pastes == 1
+
+    def test_memory_backend_notifies_watcher(self):
+        watcher = clipboard.MemoryWatcher()
+        clipboard.set_backend(clipboard.MemoryBackend(watcher))
+        clipboard.write("x")
+        assert watcher.wait(0.01) is True
+
+
+class TestCapture:
+    def test_digest_matches_storage_hash(self):
+        captured = clipboard.capture_stream(io.BytesIO("héllo".encode()))
+        assert captured == clipboard.Capture("héllo", storage.content_hash("héllo"), 6, False)
+
+    def test_streams_in_chunks(self, monkeypatch):
+        monkeypatch.setattr(clipboard, "CHUNK_SIZE", 3)
+        captured = clipboard.capture_stream(io.BytesIO(b"abcdefgh"))
+        assert captured.content == "abcdefgh"
+
+    def test_oversize_skipped_but_hashed(self):
+        captured = clipboard.capture_stream(io.BytesIO(b"x" * 100), max_bytes=10)
+        assert captured.content is None
+        assert captured.digest == storage.content_hash("x" * 100)
+        assert captured.size == 100
+
+    def test_oversize_truncated(self):
+        captured = clipboard.capture_stream(io.BytesIO("aé".encode() * 10), max_bytes=4, truncate=True)
+        assert captured.content == "aéa"
+        assert captured.truncated is True
+
+    def test_empty_is_none(self):
+        assert clipboard.capture_stream(io.BytesIO(b"")) is None
+        assert clipboard.capture() is None
+
+    def test_backend_capture(self):
+        clipboard.write("copied")
+        assert clipboard.capture().digest == storage.content_hash("copied")
+
+    def test_transient_marker(self):
+        clipboard.write("fragment")
+        clipboard.backend().types.add("org.nspasteboard.TransientType")
+        assert clipboard.transient()
+        clipboard.write("whole result")
+        assert not clipboard.transient()
+
+
+class TestMemoryWatcher:
+    def test_times_out_without_change(self):
+        assert clipboard.MemoryWatcher().wait(0.01) is False
+
+    def test_signals_once_per_change(self):
+        watcher = clipboard.MemoryWatcher()
+        watcher.notify()
+        assert watcher.wait(0.01) is True
+        assert watcher.wait(0.01) is False
+
+
+def test_command_watcher_signals_per_line():
+    script = "import sys, time; print(flush=True); time.sleep(5)"
+    watcher = clipboard.CommandWatcher([sys.executable, "-c", script])
+    try:
+        assert watcher.wait(5) is True
+        assert watcher.wait(0.05) is False
+    finally:
+        watcher.close()
+
+
+class TestPollingWatcher:
+    def test_backs_off_while_idle(self):
+        watcher = clipboard.PollingWatcher(AdaptiveInterval(fast=0.1, ceiling=0.4, backoff=2))
+        for _ in range(5):
+            watcher.report(False)
+        assert watcher.schedule.current == 0.4
+
+    def test_change_snaps_back(self):
+        watcher = clipboard.PollingWatcher(AdaptiveInterval(fast=0.1, ceiling=0.4, backoff=2))
+        watcher.report(False)
+        watcher.report(True)
+        assert watcher.stats()["interval"] == 0.1
+        assert watcher.stats()["changes"] == 1
+
+    def test_interval_longer_than_wait_timeout(self):
+        # As the daemon calls it: short waits so it can check for shutdown.
+        # Polls must still only come once per (backed-off) interval.
+        watcher = clipboard.PollingWatcher(AdaptiveInterval(fast=0.3, ceiling=0.3))
+        timeout = 0.1
+        polls = 0
+        start = time.monotonic()
+        while time.monotonic() - start < 0.65:
+            polls += watcher.wait(timeout)
+        assert polls == 2
+
+    def test_wake_interrupts_long_sleep(self):
+        watcher = clipboard.PollingWatcher(AdaptiveInterval(fast=10, ceiling=10))
+        threading.Timer(0.02, watcher.wake).start()
+        start = time.monotonic()
+        assert watcher.wait(10) is True
+        assert time.monotonic() - start < 1
+        assert watcher.stats()["wakes"] == 1
@@ -0,0 +1,45 @@
+import pytest
+
+from clippy import storage
+from clippy.display import kind, line_count, title
+
+
+def test_title_truncates_single_line():
+    assert title("a\nb") == "a b"
+    assert title("  x  \n") == "x"
+    assert title("x" * 100) == "x" * 60 + "..."
+
+
+def test_line_count():
+    assert [line_count(t) for t in ("a", "a\n", "a\nb", "a\n\nb\n")] == [1, 1, 2, 3]
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("https://example.com/a?b=1", "url"),
+        ("  /usr/local/bin/clippy\n", "path"),
+        ("~/Documents/notes.txt", "path"),
+        ("def f(x):\n    return x + 1\n", "code"),
+        ("int main() {\n    return 0;\n}\n", "code"),
+        ("see https://example.com for details", "text"),
+        ("Dear Sam,\nThanks for the notes.\nSee you soon", "text"),
+    ],
+)
+def test_kind(text, expected):
+    assert kind(text) == expected
+
+
+def test_summary_stored_at_insert(clippy_dir, monkeypatch):
+    monkeypatch.setattr(storage, "BLOB_THRESHOLD", 10)
+    content = "import os\n" + "x = 1;\n" * 20
+    storage.add_item(content)
+    [summary] = storage.get_summaries()
+    assert summary == storage.summarize(content, storage.content_hash(content), summary["ts"])
+    assert (summary["lines"], summary["kind"]) == (21, "code")
+    # Listing never opens the blob; the content is read only on demand.
+    for blob in (clippy_dir / "blobs").rglob("*"):
+        if blob.is_file():
+            blob.unlink()
+    assert storage.get_summaries() == [summary]
+    assert storage.get_by_hash(summary["hash"]) is None
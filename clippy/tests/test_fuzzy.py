@@ -0,0 +1,59 @@
+from clippy import fuzzy, storage
+
+
+def test_search_key_normalises():
+    assert fuzzy.search_key("  Café\n\tLATTE  ") == "cafe latte"
+
+
+def test_search_key_is_bounded():
+    assert len(fuzzy.search_key("x" * 10_000_000)) == fuzzy.MAX_KEY_LEN
+
+
+class TestScore:
+    def test_subsequence(self):
+        assert fuzzy.score("gco", "git checkout") is not None
+        assert fuzzy.score("xyz", "git checkout") is None
+
+    def test_substring_beats_scattered(self):
+        assert fuzzy.score("check", "git checkout") > fuzzy.score("check", "c h e c k")
+
+    def test_word_start_beats_mid_word(self):
+        assert fuzzy.score("co", "git co") > fuzzy.score("co", "git deco")
+
+
+class TestMatcher:
+    def test_empty_query_keeps_recency_order(self):
+        matcher = fuzzy.Matcher(["b", "a", "c"], limit=2)
+        assert matcher.update("") == [0, 1]
+
+    def test_narrows_previous_candidates(self, monkeypatch):
+        keys = ["git push", "git pull", "docker ps"]
+        matcher = fuzzy.Matcher(keys)
+        assert matcher.update("p") == [0, 1, 2]
+
+        scored: list[str] = []
+        real_score = fuzzy.score
+        monkeypatch.setattr(
+            fuzzy, "score", lambda q, k: scored.append(k) or real_score(q, k)
+        )
+        assert matcher.update("pu") == [0, 1]
+        assert matcher.update("pus") == [0]
+        assert scored == ["git push", "git pull", "docker ps", "git push", "git pull"]
+
+    def test_backspace_reuses_cached_set(self, monkeypatch):
+        matcher = fuzzy.Matcher(["alpha", "beta"])
+        matcher.update("a")
+        matcher.update("al")
+        monkeypatch.setattr(fuzzy, "score", lambda q, k: 1 / 0)
+        assert matcher.update("a") == [0, 1]
+        assert matcher.update("") == [0, 1]
+
+    def test_ranks_best_match_first(self):
+        matcher = fuzzy.Matcher(["a long thing with s t a t u s", "git status"])
+        assert matcher.update("status") == [1, 0]
+
+
+def test_keys_stored_at_insert():
+    storage.add_item("Hello  World")
+    [(summary, key)] = storage.get_keyed_summaries()
+    assert (summary["title"], key) == ("Hello  World", "hello world")
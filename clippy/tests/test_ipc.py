@@ -0,0 +1,61 @@
+import pytest
+
+from clippy import ipc, storage
+from clippy.cache import HistoryCache
+
+
+@pytest.fixture
+def server():
+    cache = HistoryCache()
+    written: list[str] = []
+    handlers = ipc.history_handlers(cache, lambda item: written.append(item["content"]) or True)
+    srv = ipc.Server(ipc.socket_path(), handlers)
+    srv.start()
+    srv.cache, srv.written = cache, written
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_unreachable_daemon_returns_none():
+    assert ipc.request("ping") is None
+
+
+def test_serves_from_memory(server):
+    server.cache.add("one")
+    server.cache.add("two")
+    assert [s["title"] for s in ipc.request("list", limit=5)["items"]] == ["two", "one"]
+    assert ipc.request("get", n=2)["item"]["content"] == "one"
+    assert ipc.request("get", n=3)["item"] is None
+
+
+def test_yank_writes_clipboard_in_daemon(server):
+    server.cache.add("copied")
+    assert ipc.request("yank", n=1)["written"] is True
+    assert server.written == ["copied"]
+
+
+def test_search(server):
+    server.cache.add("git status")
+    [[n, item]] = ipc.request("search", query="status")["hits"]
+    assert (n, item["content"]) == (1, "git status")
+
+
+def test_clear_goes_through_cache(server):
+    server.cache.add("x")
+    ipc.request("clear")
+    assert server.cache.items(10) == []
+    assert storage.get_items() == []
+
+
+def test_errors_are_raised(server):
+    with pytest.raises(RuntimeError, match="KeyError"):
+        ipc.request("nope")
+
+
+def test_socket_removed_on_close(server):
+    path = ipc.socket_path()
+    assert path.exists()
+    server.shutdown()
+    server.server_close()
+    assert not path.exists()
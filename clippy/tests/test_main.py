@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from typer.testing import CliRunner
+
+from clippy import main, storage
+from clippy.cli import app
+
+
+@pytest.fixture(autouse=True)
+def no_daemon(monkeypatch):
+    monkeypatch.setattr(main.ipc, "request", lambda op, **params: None)
+
+
+@pytest.mark.parametrize("argv", [["get", "2"], ["list"], ["list", "--limit", "1"], ["list", "--limit=1"]])
+def test_fast_path_matches_typer(argv, capsys):
+    storage.add_item("first")
+    storage.add_item("second\nline")
+    assert main.fast_path(argv) == 0
+    assert capsys.readouterr().out == CliRunner().invoke(app, argv).output
+
+
+def test_fast_path_empty_history(capsys):
+    assert main.fast_path(["list"]) == 0
+    assert capsys.readouterr().out == "No history\n"
+
+
+def test_fast_path_invalid_index(capsys):
+    storage.add_item("only")
+    assert main.fast_path(["get", "5"]) == 1
+    assert capsys.readouterr().err == "Invalid index: 5\n"
+
+
+@pytest.mark.parametrize("argv", [[], ["get"], ["get", "x"], ["list", "--limit"], ["list", "-n", "3"], ["search", "a"]])
+def test_unrecognised_falls_through(argv):
+    assert main.fast_path(argv) is None
+
+
+def test_fast_path_skips_typer(clippy_dir):
+    code = (
+        "import sys; from pathlib import Path; from clippy import main, storage; "
+        f"storage.use_dir(Path({str(clippy_dir)!r})); "
+        "main.ipc.request = lambda op, **params: None; "
+        "main.fast_path(['list']); "
+        "print([m for m in ('typer', 'clippy.cli', 'clippy.cache') if m in sys.modules])"
+    )
+    # A throwaway HOME too, so nothing the child derives from it touches ~/.clippy.
+    env = {**os.environ, "HOME": str(clippy_dir)}
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    assert result.stdout.splitlines()[-1] == "[]"
@@ -0,0 +1,136 @@
+import functools
+
+from clippy import storage
+from clippy.cache import HistoryCache
+from clippy.menu_model import MenuModel, Pager
+from clippy.writer import WriteBehind
+
+
+def _added(content: str) -> tuple[storage.HistoryItem, storage.ItemSummary]:
+    return {"content": content, "ts": 0.0}, storage.summarize(content, content, 0.0)
+
+
+class TestMenuModel:
+    def test_prepend_evicts_beyond_capacity(self):
+        model = MenuModel(capacity=2)
+        for c in ("a", "b", "c"):
+            model.prepend(*_added(c))
+        _gen, entries = model.entries()
+        assert [e.title for e in entries] == ["c", "b"]
+        assert entries[0].key == "c"
+
+    def test_changes_since_replays_prepends(self):
+        model = MenuModel(capacity=10)
+        model.reset([(_added("a")[1], "a")])
+        gen, _ = model.entries()
+        model.prepend(*_added("b"))
+        model.prepend(*_added("c"))
+        new_gen, changes = model.changes_since(gen)
+        assert new_gen == gen + 2
+        assert [(c.entry.title, c.moved_from) for c in changes] == [("b", None), ("c", None)]
+        assert model.changes_since(new_gen) == (new_gen, [])
+
+    def test_reset_forces_rebuild(self):
+        model = MenuModel(capacity=10)
+        model.prepend(*_added("a"))
+        gen, _ = model.entries()
+        model.reset([])
+        assert model.changes_since(gen) is None
+
+    def test_recopy_is_replayed_as_a_move(self):
+        model = MenuModel(capacity=10)
+        for c in ("a", "b", "c"):
+            model.prepend(*_added(c))
+        gen, view = model.entries()
+        view = [e.title for e in view]
+        model.prepend(*_added("a"))
+        model.prepend(*_added("d"))
+        new_gen, changes = model.changes_since(gen)
+        assert [(c.entry.title, c.moved_from) for c in changes] == [("a", 2), ("d", None)]
+        # Replaying them the way the picker does lands on the model's order.
+        for entry, moved_from in changes:
+            if moved_from is not None:
+                del view[moved_from]
+            view.insert(0, entry.title)
+        assert view == [e.title for e in model.entries()[1]] == ["d", "a", "c", "b"]
+
+    def test_stale_view_forces_rebuild(self, monkeypatch):
+        monkeypatch.setattr("clippy.menu_model.CHANGE_LOG_SIZE", 2)
+        model = MenuModel(capacity=10)
+        for c in ("a", "b", "c", "d"):
+            model.prepend(*_added(c))
+        assert model.changes_since(0) is None
+        assert model.changes_since(2) is not None
+
+
+class TestPager:
+    def _pager(self, monkeypatch, count):
+        monkeypatch.setattr(storage, "MAX_ITEMS", 1000)
+        for i in range(count):
+            storage.add_item(f"item {i}")
+        calls = []
+
+        def fetch(limit, offset, before):
+            calls.append((offset, before))
+            return storage.get_page(limit, offset=offset, before=before)
+
+        return Pager(fetch, page_size=3), calls
+
+    def test_pages_follow_cursor(self, monkeypatch):
+        pager, calls = self._pager(monkeypatch, 10)
+        assert [e.title for e in pager.page(1)] == ["item 6", "item 5", "item 4"]
+        assert [e.title for e in pager.page(2)] == ["item 3", "item 2", "item 1"]
+        assert [e.title for e in pager.page(3)] == ["item 0"]
+        assert calls[0] == (3, None)
+        assert all(offset == 0 and before is not None for offset, before in calls[1:])
+
+    def test_keeps_only_recent_pages(self, monkeypatch):
+        monkeypatch.setattr("clippy.menu_model.KEEP_PAGES", 2)
+        pager, calls = self._pager(monkeypatch, 20)
+        for n in (1, 2, 3, 3, 2):
+            pager.page(n)
+        assert len(calls) == 3
+        pager.page(1)
+        assert len(calls) == 4
+
+    def test_pending_writes_flushed_before_paging(self, monkeypatch):
+        for i in range(10):
+            storage.add_item(f"item {i}")
+        # Hold the copy below in the writer's queue while the page is read.
+        monkeypatch.setattr("clippy.cache.WriteBehind", functools.partial(WriteBehind, linger=0.2))
+        cache = HistoryCache()
+        cache.add("newest")
+        head = [s["title"] for s in cache.summaries(3)]
+        pager = Pager(storage.get_page, page_size=3, flush=cache.flush)
+        assert head + [e.title for e in pager.page(1)] == [
+            "newest", "item 9", "item 8", "item 7", "item 6", "item 5"
+        ]
+        cache.close()
+
+    def test_reset_refetches(self, monkeypatch):
+        pager, _calls = self._pager(monkeypatch, 10)
+        pager.page(1)
+        storage.add_item("newest")
+        assert pager.page(1)[0].title == "item 6"
+        pager.reset()
+        assert pager.page(1)[0].title == "item 7"
+
+
+def test_cache_listeners_follow_history():
+    seen: list = []
+    cache = HistoryCache()
+    cache.listeners.append(seen.append)
+    cache.add("x")
+    cache.add("x")
+    cache.clear()
+    assert [added and added[1]["title"] for added in seen] == ["x", None]
+
+
+def test_cache_moves_recopy_to_front():
+    cache = HistoryCache()
+    for c in ("a", "b", "a"):
+        cache.add(c)
+    assert [i["content"] for i in cache.items(10)] == ["a", "b"]
+    assert [s["title"] for s in cache.summaries(10)] == ["a", "b"]
+    cache.flush()
+    assert [i["content"] for i in storage.get_items()] == ["a", "b"]
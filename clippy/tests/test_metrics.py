@@ -0,0 +1,86 @@
+import json
+
+import pytest
+from typer.testing import CliRunner
+
+from clippy import cli, ipc, metrics, storage
+from clippy.cache import HistoryCache
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.reset()
+
+
+def test_percentiles():
+    for ms in range(1, 101):
+        metrics.observe("op", ms)
+    t = metrics.snapshot()["timings_ms"]["op"]
+    assert (t["count"], t["p50"], t["p95"], t["p99"], t["max"]) == (100, 51, 96, 100, 100)
+
+
+def test_window_is_rolling(monkeypatch):
+    monkeypatch.setattr(metrics, "WINDOW", 2)
+    for ms in (100, 1, 1):
+        metrics.observe("op", ms)
+    assert metrics.snapshot()["timings_ms"]["op"]["max"] == 1
+
+
+def test_storage_counters():
+    storage.add_item("abc")
+    storage.add_item("abc")
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"] == {
+        "storage.bytes_written": 3,
+        "storage.commits": 1,
+        "storage.dedup_skips": 1,
+    }
+    assert snapshot["timings_ms"]["storage.add"]["count"] == 2
+
+
+def test_dump(tmp_path):
+    metrics.incr("x")
+    metrics.dump(tmp_path / "stats.json", {"watcher": {}})
+    dumped = json.loads((tmp_path / "stats.json").read_text())
+    assert dumped["counters"] == {"x": 1}
+    assert "watcher" in dumped
+
+
+def test_cli_stats(monkeypatch):
+    metrics.observe("capture.total", 2.5)
+    def stats() -> dict:
+        return {"watcher": {"watcher": "Fake"}, **metrics.snapshot()}
+
+    handlers = ipc.history_handlers(HistoryCache(), lambda _: True, stats=stats)
+    server = ipc.Server(ipc.socket_path(), handlers)
+    server.start()
+    monkeypatch.setattr(cli, "_get_daemon_pid", lambda: 1)
+    try:
+        result = CliRunner().invoke(cli.app, ["stats"])
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert result.exit_code == 0
+    assert "capture.total" in result.output and "2.50" in result.output
+
+
+def test_cli_status_counts_unscanned(monkeypatch):
+    metrics.incr("filter.timeouts", 3)
+    metrics.incr("filter.unscanned_skips", 1)
+    def stats() -> dict:
+        return {"watcher": {"watcher": "Fake"}, **metrics.snapshot()}
+
+    handlers = ipc.history_handlers(HistoryCache(), lambda _: True, stats=stats)
+    server = ipc.Server(ipc.socket_path(), handlers)
+    server.start()
+    monkeypatch.setattr(cli, "_get_daemon_pid", lambda: 1)
+    try:
+        result = CliRunner().invoke(cli.app, ["status"])
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert "not fully scanned: 3 (1 skipped)" in result.output
+
+def test_cli_stats_without_daemon():
+    result = CliRunner().invoke(cli.app, ["stats"])
+    assert result.exit_code == 1
@@ -0,0 +1,115 @@
+import io
+
+from clippy import clipboard, main, storage
+from clippy.cache import HistoryCache
+from clippy.thumbnails import THUMBNAIL_PX, Thumbnailer
+
+
+PNG = clipboard.Payload("image/png", b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 40)
+RTF = clipboard.Payload("text/rtf", rb"{\rtf1\ansi hello}")
+
+
+def _copy(cache: HistoryCache, payload: clipboard.Payload) -> str:
+    clipboard.backend().write_payload(payload)
+    captured = clipboard.capture()
+    cache.add_payload(captured.payload.type, captured.payload.data, captured.digest)
+    cache.flush()
+    return captured.digest
+
+
+def test_capture_falls_back_to_binary():
+    clipboard.backend().write_payload(PNG)
+    captured = clipboard.capture()
+    assert captured.content is None
+    assert captured.payload == PNG
+    assert captured.size == len(PNG.data)
+
+
+def test_oversize_payload_hashed_but_dropped():
+    captured = clipboard.capture_payload(PNG.type, PNG.data, max_bytes=10)
+    assert captured.payload is None
+    assert captured.size == len(PNG.data)
+
+
+def test_payload_stored_out_of_line():
+    cache = HistoryCache()
+    digest = _copy(cache, PNG)
+    summary = storage.get_summaries(limit=1)[0]
+    assert summary["kind"] == "image"
+    assert summary["payload"] == "image/png"
+    assert summary["title"] == "[PNG image, 10.0 KB]"
+    assert summary["size"] == len(PNG.data)
+    assert storage.read_payload(digest) == PNG.data
+    item = storage.get_item(1)
+    assert item["payload"] == {"type": "image/png", "hash": digest, "size": len(PNG.data)}
+    assert list(storage.iter_items()) == []
+    cache.close()
+
+
+def test_insert_never_reads_the_payload_file():
+    # A GC can unlink the file before the queued row is written; the size
+    # travels with the item, so the batch still commits.
+    item: storage.HistoryItem = {
+        "content": "[PNG image, 3 B]",
+        "ts": 1.0,
+        "payload": {"type": "image/png", "hash": "gone", "size": 3},
+    }
+    assert storage.add_items([(item, "gone")]) == 1
+    assert storage.get_summaries(limit=1)[0]["size"] == 3
+
+def test_write_item_restores_payload():
+    cache = HistoryCache()
+    _copy(cache, RTF)
+    clipboard.write("something else")
+    assert clipboard.write_item(storage.get_item(1)) is True
+    assert clipboard.backend().payload == RTF
+    cache.close()
+
+
+def test_get_writes_raw_bytes(monkeypatch):
+    cache = HistoryCache()
+    _copy(cache, PNG)
+    cache.close()
+    out = io.TextIOWrapper(io.BytesIO())
+    monkeypatch.setattr("sys.stdout", out)
+    assert main.fast_path(["get", "1"]) == 0
+    assert out.buffer.getvalue() == PNG.data
+
+
+def test_thumbnail_rendered_once_in_background():
+    cache = HistoryCache()
+    digest = _copy(cache, PNG)
+    summary = storage.get_summaries(limit=1)[0]
+    thumbnails = Thumbnailer()
+    thumbnails.request(summary)
+    thumbnails.request(summary)
+    thumbnails.close()
+    path = thumbnails.path(digest)
+    assert path.read_bytes() == f"thumbnail image/png {len(PNG.data)} {THUMBNAIL_PX}".encode()
+    assert clipboard.backend().thumbnails == 1
+    cache.close()
+
+
+def test_text_and_rich_items_get_no_thumbnail():
+    cache = HistoryCache()
+    cache.add("plain")
+    rtf = _copy(cache, RTF)
+    thumbnails = Thumbnailer()
+    for summary in storage.get_summaries(limit=2):
+        thumbnails.request(summary)
+    thumbnails.close()
+    assert thumbnails.path(rtf) is None
+    assert clipboard.backend().thumbnails == 0
+    cache.close()
+
+
+def test_clear_removes_payload_and_thumbnail():
+    cache = HistoryCache()
+    digest = _copy(cache, PNG)
+    thumbnails = Thumbnailer()
+    thumbnails.request(storage.get_summaries(limit=1)[0])
+    thumbnails.close()
+    cache.clear()
+    assert storage.read_payload(digest) is None
+    assert not storage.thumbnail_path(digest).exists()
+    cache.close()
@@ -0,0 +1,85 @@
+import sqlite3
+
+from clippy import storage
+from clippy.cache import HistoryCache
+
+
+def _contents() -> list[str]:
+    return [item["content"] for item in storage.get_items(limit=-1)]
+
+
+def test_configure_reads_retention_table(clippy_dir):
+    (clippy_dir / "config.toml").write_text(
+        "[retention]\nmax_items = 5000\nmax_age_days = 30\nmax_bytes = 1048576\n"
+    )
+    storage.configure()
+    assert (storage.MAX_ITEMS, storage.MAX_AGE_DAYS, storage.MAX_BYTES) == (5000, 30, 1048576)
+
+
+def test_configure_without_file_keeps_defaults():
+    storage.configure()
+    assert storage.MAX_ITEMS == 50
+
+
+class TestPrune:
+    def test_by_age(self, clippy_dir, monkeypatch):
+        storage.add_item("old")
+        with sqlite3.connect(clippy_dir / "history.db") as conn:
+            conn.execute("UPDATE items SET ts = 0")
+        storage.add_item("new")
+        monkeypatch.setattr(storage, "MAX_AGE_DAYS", 1)
+        storage.compact()
+        assert _contents() == ["new"]
+
+    def test_by_total_bytes(self, monkeypatch):
+        for c in ("aaaa", "bbbb", "cccc"):
+            storage.add_item(c)
+        monkeypatch.setattr(storage, "MAX_BYTES", 9)
+        storage.compact()
+        assert _contents() == ["cccc", "bbbb"]
+
+
+class TestColdSegments:
+    def test_items_past_warm_tier_are_compressed(self, clippy_dir, monkeypatch):
+        monkeypatch.setattr(storage, "WARM_ITEMS", 2)
+        monkeypatch.setattr(storage, "SEGMENT_ITEMS", 3)
+        for i in range(6):
+            storage.add_item(f"item {i}")
+        storage.compact()
+
+        assert len(list((clippy_dir / "cold").iterdir())) == 1
+        conn = sqlite3.connect(clippy_dir / "history.db")
+        frozen = conn.execute("SELECT COUNT(*) FROM items WHERE segment IS NOT NULL")
+        assert frozen.fetchone() == (3,)
+        assert _contents() == [f"item {i}" for i in reversed(range(6))]
+        assert storage.search("item 0")[0][1]["content"] == "item 0"
+
+    def test_partial_segments_stay_warm(self, clippy_dir, monkeypatch):
+        monkeypatch.setattr(storage, "WARM_ITEMS", 2)
+        monkeypatch.setattr(storage, "SEGMENT_ITEMS", 10)
+        for i in range(6):
+            storage.add_item(f"item {i}")
+        storage.compact()
+        assert not (clippy_dir / "cold").exists()
+
+    def test_segment_deleted_with_last_item(self, clippy_dir, monkeypatch):
+        monkeypatch.setattr(storage, "WARM_ITEMS", 0)
+        monkeypatch.setattr(storage, "SEGMENT_ITEMS", 2)
+        storage.add_item("a")
+        storage.add_item("b")
+        storage.compact()
+        monkeypatch.setattr(storage, "MAX_ITEMS", 2)
+        storage.add_item("c")
+        assert list((clippy_dir / "cold").iterdir()) != []
+        storage.add_item("d")
+        assert list((clippy_dir / "cold").iterdir()) == []
+
+
+def test_cache_reads_past_hot_tier(monkeypatch):
+    monkeypatch.setattr(storage, "HOT_ITEMS", 2)
+    for i in range(4):
+        storage.add_item(f"item {i}")
+    cache = HistoryCache()
+    assert [i["content"] for i in cache.items(3)] == ["item 3", "item 2", "item 1"]
+    assert cache.get(4)["content"] == "item 0"
+    assert cache.get(5) is None
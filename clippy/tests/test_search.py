@@ -0,0 +1,59 @@
+from typer.testing import CliRunner
+
+from clippy import search, storage
+from clippy.cli import app
+
+
+class TestRank:
+    def test_requires_every_term(self):
+        assert [item_id for item_id, _ in search.rank([{1: 1, 2: 1}, {2: 1}], total=2)] == [2]
+
+    def test_rare_terms_outrank_common_ones(self):
+        common = search.rank([{1: 1, 2: 1, 3: 1}], total=3)[0][1]
+        rare = search.rank([{4: 1}], total=3)[0][1]
+        assert rare > common
+
+    def test_ties_favour_newest(self):
+        assert [item_id for item_id, _ in search.rank([{1: 1, 5: 1}], total=2)] == [5, 1]
+
+    def test_missing_term_matches_nothing(self):
+        assert search.rank([{1: 1}, {}], total=1) == []
+
+
+def test_tokenize_lowercases_words():
+    assert search.tokenize("Foo foo-bar") == {"foo": 2, "bar": 1}
+
+
+class TestStorageSearch:
+    def test_ranks_and_reports_positions(self):
+        storage.add_item("git push origin main")
+        storage.add_item("docker compose up")
+        storage.add_item("git status")
+
+        hits = storage.search("git")
+        assert [(n, item["content"]) for n, item in hits] == [
+            (1, "git status"),
+            (3, "git push origin main"),
+        ]
+
+    def test_prefix_of_last_word(self):
+        storage.add_item("kubectl get pods")
+        assert storage.search("kubectl po")[0][1]["content"] == "kubectl get pods"
+
+    def test_evicted_items_leave_index(self, monkeypatch):
+        monkeypatch.setattr(storage, "MAX_ITEMS", 1)
+        storage.add_item("alpha")
+        storage.add_item("beta")
+        assert storage.search("alpha") == []
+
+    def test_searches_blob_content(self, monkeypatch):
+        monkeypatch.setattr(storage, "BLOB_THRESHOLD", 8)
+        storage.add_item("needle " + "hay " * 50)
+        assert len(storage.search("needle")) == 1
+
+
+def test_cli_search():
+    storage.add_item("hello world")
+    result = CliRunner().invoke(app, ["search", "world"])
+    assert result.exit_code == 0
+    assert "1. [" in result.output and "hello world" in result.output
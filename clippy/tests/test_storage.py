@@ -0,0 +1,122 @@
+import json
+import sqlite3
+
+from clippy import storage
+
+
+class TestAddItem:
+    def test_newest_first(self):
+        storage.add_item("one")
+        storage.add_item("two")
+        assert [i["content"] for i in storage.get_items()] == ["two", "one"]
+
+    def test_skips_blank(self):
+        storage.add_item("   \n")
+        assert storage.get_items() == []
+
+    def test_skips_repeat_of_newest(self):
+        storage.add_item("same")
+        storage.add_item("same")
+        assert len(storage.get_items()) == 1
+
+    def test_recopy_moves_to_front(self):
+        for content in ("a", "b", "a", "b", "a"):
+            storage.add_item(content)
+        assert [i["content"] for i in storage.get_items()] == ["a", "b"]
+        assert storage.search("a")[0][0] == 1
+        storage.add_item("c")
+        assert [s["title"] for s in storage.get_summaries()] == ["c", "a", "b"]
+
+    def test_evicts_beyond_max_items(self, monkeypatch):
+        monkeypatch.setattr(storage, "MAX_ITEMS", 3)
+        for i in range(5):
+            storage.add_item(f"item {i}")
+        assert [i["content"] for i in storage.get_items()] == ["item 4", "item 3", "item 2"]
+
+    def test_indexed_columns(self, clippy_dir):
+        storage.add_item("héllo")
+        conn = sqlite3.connect(clippy_dir / "history.db")
+        digest, size = conn.execute("SELECT hash, size FROM items").fetchone()
+        assert digest == storage.content_hash("héllo")
+        assert size == len("héllo".encode())
+
+
+class TestMigration:
+    def test_collapses_duplicates(self, clippy_dir):
+        storage.add_item("dup")
+        storage.add_item("other")
+        conn = storage._connect()
+        conn.execute("DROP INDEX items_hash")
+        conn.execute("ALTER TABLE items DROP COLUMN payload")
+        conn.execute(
+            "INSERT INTO items (ts, hash, size, content, search_key, title) "
+            "SELECT ts + 1, hash, size, content, search_key, title FROM items WHERE content = 'dup'"
+        )
+        conn.execute("PRAGMA user_version = 7")
+        conn.close()
+        storage._local.conn = None
+
+        assert [i["content"] for i in storage.get_items()] == ["dup", "other"]
+
+    def test_imports_legacy_json_once(self, clippy_dir):
+        legacy = [{"content": "newer", "ts": 2.0}, {"content": "older", "ts": 1.0}]
+        (clippy_dir / "history.json").write_text(json.dumps(legacy))
+
+        assert storage.get_items() == legacy
+        assert not (clippy_dir / "history.json").exists()
+        assert (clippy_dir / "history.json.migrated").exists()
+
+    def test_wal_mode(self, clippy_dir):
+        storage.get_items()
+        conn = sqlite3.connect(clippy_dir / "history.db")
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+class TestBlobs:
+    def test_large_content_stored_out_of_line(self, clippy_dir, monkeypatch):
+        monkeypatch.setattr(storage, "BLOB_THRESHOLD", 8)
+        big = "x" * 100
+        storage.add_item(big)
+
+        blobs = list((clippy_dir / "blobs").rglob("*"))
+        assert [p.name for p in blobs if p.is_file()] == [storage.content_hash(big)]
+        conn = sqlite3.connect(clippy_dir / "history.db")
+        assert conn.execute("SELECT content, blob FROM items").fetchone() == ("", 1)
+        assert storage.get_items()[0]["content"] == big
+
+    def test_identical_payloads_share_blob(self, clippy_dir, monkeypatch):
+        monkeypatch.setattr(storage, "BLOB_THRESHOLD", 8)
+        storage.add_item("a" * 100)
+        storage.add_item("small")
+        storage.add_item("a" * 100)
+
+        assert len([p for p in (clippy_dir / "blobs").rglob("*") if p.is_file()]) == 1
+        assert [i["content"] for i in storage.get_items()] == ["a" * 100, "small"]
+
+    def test_orphans_collected_on_eviction(self, clippy_dir, monkeypatch):
+        monkeypatch.setattr(storage, "BLOB_THRESHOLD", 8)
+        monkeypatch.setattr(storage, "MAX_ITEMS", 2)
+        storage.add_item("a" * 100)
+        storage.add_item("b" * 100)
+        storage.add_item("c" * 100)
+
+        names = {p.name for p in (clippy_dir / "blobs").rglob("*") if p.is_file()}
+        assert names == {storage.content_hash("b" * 100), storage.content_hash("c" * 100)}
+
+
+def test_get_page_by_offset_and_cursor(monkeypatch):
+    monkeypatch.setattr(storage, "MAX_ITEMS", 100)
+    for i in range(7):
+        storage.add_item(f"item {i}")
+    first = storage.get_page(3, offset=1)
+    assert [summary["title"] for _id, summary, _key in first] == ["item 5", "item 4", "item 3"]
+    assert first[0][2] == "item 5"
+    second = storage.get_page(3, before=first[-1][0])
+    assert [summary["title"] for _id, summary, _key in second] == ["item 2", "item 1", "item 0"]
+    assert storage.get_page(3, before=second[-1][0]) == []
+
+
+def test_clear_history():
+    storage.add_item("x")
+    storage.clear_history()
+    assert storage.load_history() == []
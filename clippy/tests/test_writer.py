@@ -0,0 +1,72 @@
+import subprocess
+import sys
+import threading
+
+from clippy import storage
+from clippy.cache import HistoryCache
+from clippy.writer import WriteBehind
+
+
+def test_burst_is_group_committed():
+    gate = threading.Event()
+    batches: list[list[int]] = []
+
+    def commit(batch):
+        gate.wait()
+        batches.append(batch)
+
+    writer = WriteBehind(commit, linger=0)
+    for i in range(5):
+        writer.put(i)
+    gate.set()
+    writer.flush()
+    # The first entry may be taken before the rest arrive; the others share a commit.
+    assert [i for b in batches for i in b] == [0, 1, 2, 3, 4]
+    assert len(batches) <= 2
+    writer.close()
+
+
+def test_close_commits_pending():
+    batches: list[list[str]] = []
+    writer = WriteBehind(batches.append, linger=10)
+    writer.put("a")
+    writer.close()
+    assert batches == [["a"]]
+
+
+def test_failed_commit_does_not_wedge_flush(capsys):
+    writer = WriteBehind(lambda batch: 1 / 0, linger=0)
+    writer.put("a")
+    writer.flush()
+    assert "History write failed" in capsys.readouterr().err
+
+
+def test_cache_persists_behind_adds():
+    cache = HistoryCache()
+    cache.add("one")
+    cache.add("two")
+    cache.add("two")
+    assert [i["content"] for i in cache.items(5)] == ["two", "one"]
+    cache.flush()
+    assert [i["content"] for i in storage.get_items()] == ["two", "one"]
+    cache.close()
+
+
+def test_dedup_survives_restart():
+    storage.add_item("same")
+    assert HistoryCache().add("same") is None
+
+
+def test_write_lock_excludes_other_processes():
+    probe = (
+        "import fcntl, sys\n"
+        "with open(sys.argv[1], 'a') as f:\n"
+        "    try:\n"
+        "        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)\n"
+        "    except BlockingIOError:\n"
+        "        sys.exit(1)\n"
+    )
+    argv = [sys.executable, "-c", probe, str(storage.LOCK_FILE)]
+    with storage.write_lock():
+        assert subprocess.run(argv).returncode == 1
+    assert subprocess.run(argv).returncode == 0
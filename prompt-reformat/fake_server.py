@@ -0,0 +1,125 @@
+"""Local stand-in for the Groq (OpenAI-compatible) chat completions API.
+
+Also answers GET /models, which the app uses as its warm-up ping.
+
+Replies by echoing the user message back a word at a time, streamed as
+server-sent events when the request asks for `stream`. Point the app at it
+with GROQ_BASE_URL:
+
+    python fake_server.py --port 8765 --ttft 0.4 --token-delay 0.03
+    GROQ_BASE_URL=http://127.0.0.1:8765 GROQ_API_KEY=fake python main.py
+"""
+
+import argparse
+import json
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so streamed replies can be chunked and connections kept alive.
+    protocol_version = "HTTP/1.1"
+    ttft = 0.0
+    token_delay = 0.0
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self) -> None:
+        if self.path.endswith("/models"):
+            model = {"id": "fake", "object": "model", "created": 0, "owned_by": "fake"}
+            self._send_json(200, {"object": "list", "data": [model]})
+        else:
+            self._send_json(404, {"error": {"message": f"No route for {self.path}"}})
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"No route for {self.path}"}})
+            return
+        reply = next((m["content"] for m in reversed(body.get("messages", [])) if m["role"] == "user"), "")
+        tokens = re.findall(r"\S+\s*|\s+", reply)
+        time.sleep(self.ttft)
+        if body.get("stream"):
+            self._stream(body.get("model", ""), tokens)
+        else:
+            self._send_json(200, _completion(body.get("model", ""), reply))
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, model: str, tokens: list[str]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.token_delay)
+            self._event(json.dumps(_chunk(model, {"content": token}, None)))
+        self._event(json.dumps(_chunk(model, {}, "stop")))
+        self._event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _event(self, data: str) -> None:
+        event = f"data: {data}\n\n".encode()
+        self.wfile.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+        self.wfile.flush()
+
+
+def _completion(model: str, content: str) -> dict:
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+        ],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def _chunk(model: str, delta: dict, finish_reason: str | None) -> dict:
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+def serve(port: int = 0, ttft: float = 0.0, token_delay: float = 0.0) -> ThreadingHTTPServer:
+    """A server bound to 127.0.0.1; call serve_forever() on it (port 0 picks
+    one). Its `connections` counts the TCP connections accepted."""
+    handler = type("ConfiguredHandler", (Handler,), {"ttft": ttft, "token_delay": token_delay})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.connections = 0
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft", type=float, default=0.4, help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.03, help="seconds between tokens")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.ttft, args.token_delay)
+    print(f"Fake completions API on http://127.0.0.1:{server.server_address[1]}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
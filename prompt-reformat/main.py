@@ -5,9 +5,13 @@ from pathlib import Path
 from pynput import keyboard
 from pynput.keyboard import Controller, Key
 
-from reformat import reformat_prompt
+import reformat
+from reformat import reformat_prompt, stream_reformat
 
 kb = Controller()
+# Marks a clipboard write as intermediate (nspasteboard.org convention), so
+# clipboard history managers don't record it.
+TRANSIENT_TYPE = "org.nspasteboard.TransientType"
 
 
 def get_clipboard() -> str:
@@ -15,8 +19,17 @@ def get_clipboard() -> str:
     return result.stdout
 
 
-def set_clipboard(text: str) -> None:
-    subprocess.run(["pbcopy"], input=text, text=True)
+def set_clipboard(text: str, transient: bool = False) -> None:
+    if not transient:
+        subprocess.run(["pbcopy"], input=text, text=True)
+        return
+    # pbcopy can't add a marker type; AppKit comes with pynput on macOS.
+    from AppKit import NSPasteboard, NSPasteboardTypeString
+
+    pasteboard = NSPasteboard.generalPasteboard()
+    pasteboard.declareTypes_owner_([NSPasteboardTypeString, TRANSIENT_TYPE], None)
+    pasteboard.setString_forType_(text, NSPasteboardTypeString)
+    pasteboard.setString_forType_("", TRANSIENT_TYPE)
 
 
 def simulate_copy() -> None:
@@ -33,6 +46,53 @@ def simulate_paste() -> None:
     kb.release(Key.cmd)
 
 
+def paste(text: str, transient: bool = False) -> None:
+    set_clipboard(text, transient)
+    time.sleep(0.05)
+    simulate_paste()
+
+
+def notify(message: str) -> None:
+    subprocess.run(
+        [
+            "osascript",
+            "-e", "on run argv",
+            "-e", 'display notification (item 1 of argv) with title "Prompt reformat"',
+            "-e", "end run",
+            message,
+        ]
+    )
+
+
+def paste_streamed(original: str, timings: dict) -> None:
+    """Paste each chunk as it arrives; the first replaces the selection and the
+    rest follow it. Chunks go through the clipboard marked transient, so
+    clipboard history skips them. The clipboard is left holding the whole
+    result, or the original text if the stream fails part way, ready to
+    paste back over whatever was already typed."""
+    chunks = []
+    try:
+        for chunk in stream_reformat(original, timings=timings):
+            paste(chunk, transient=True)
+            chunks.append(chunk)
+            # Let the frontmost app read the clipboard before it changes again.
+            time.sleep(0.05)
+    except Exception:
+        set_clipboard(original)
+        raise
+    set_clipboard("".join(chunks))
+
+
+def log_timings(timings: dict) -> None:
+    line = f"Reformatted in {timings['total_ms']:.1f} ms"
+    if "ttft_ms" in timings:
+        line += f", first token {timings['ttft_ms']:.1f} ms"
+    if reformat.CACHE_ENABLED:
+        cache = reformat.response_cache()
+        line += f" (cache: {cache.hits} hits, {cache.misses} misses)"
+    print(line)
+
+
 def on_activate() -> None:
     simulate_copy()
     time.sleep(0.15)
@@ -41,18 +101,26 @@ def on_activate() -> None:
     if not original.strip():
         return
 
+    timings: dict = {}
     try:
-        reformatted = reformat_prompt(original)
-        set_clipboard(reformatted)
-        time.sleep(0.05)
-        simulate_paste()
+        if reformat.STREAM_ENABLED:
+            paste_streamed(original, timings)
+        else:
+            start = time.perf_counter()
+            reformatted = reformat_prompt(original)
+            timings["total_ms"] = (time.perf_counter() - start) * 1000
+            paste(reformatted)
+        log_timings(timings)
     except Exception as e:
         print(f"Error reformatting: {e}")
+        notify(f"Reformat failed: {e}. The original prompt is on the clipboard.")
 
 
 def main() -> None:
     print("Prompt reformatter running. Hotkey: Cmd+Option+P")
     print("Grant Accessibility access in System Settings if not working.")
+    if reformat.WARMUP_ENABLED:
+        reformat.keep_warm()
 
     with keyboard.GlobalHotKeys({"<cmd>+<alt>+p": on_activate}) as h:
         h.join()
@@ -1,8 +1,15 @@
 import os
+import re
+import threading
+import time
+from collections.abc import Iterator
 
+import httpx
 from dotenv import load_dotenv
 from groq import Groq
 
+from response_cache import ResponseCache, cache_key
+
 load_dotenv()
 
 SYSTEM_PROMPT = """Rewrite this prompt for an AI coding assistant. Rules:
@@ -12,21 +19,214 @@ SYSTEM_PROMPT = """Rewrite this prompt for an AI coding assistant. Rules:
 - British English
 - Output ONLY the rewritten prompt, no commentary or explanation"""
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+MODEL = "llama-3.3-70b-versatile"
+TEMPERATURE = 0.3
+# Set PROMPT_REFORMAT_NO_CACHE=1 to always ask the model.
+CACHE_ENABLED = not os.getenv("PROMPT_REFORMAT_NO_CACHE")
+# Set PROMPT_REFORMAT_STREAM=0 to paste only once the whole completion is in.
+STREAM_ENABLED = os.getenv("PROMPT_REFORMAT_STREAM", "1") != "0"
+# Streamed output is released at the last sentence end or line break seen,
+# or at the last space once this much has piled up without one.
+MAX_CHUNK_CHARS = 400
+
+_SENTENCE_END = re.compile(r"[.!?](?=\s)|\n")
+# A full stop after these, or after a single letter, doesn't end a sentence.
+_ABBREVIATIONS = {"e.g", "i.e", "etc", "vs", "cf", "approx", "mr", "mrs", "ms", "dr", "st"}
+
+# Pooled connections stay open this long between requests.
+KEEPALIVE_SECONDS = 300
+# keep_warm pings after this long without a request, before the pool drops
+# the connection. Set PROMPT_REFORMAT_WARMUP=0 to never ping.
+WARM_INTERVAL = 240
+WARMUP_ENABLED = os.getenv("PROMPT_REFORMAT_WARMUP", "1") != "0"
+
+_client: Groq | None = None
+_client_lock = threading.Lock()
+_last_request = 0.0
+_cache: ResponseCache | None = None
+
+
+class HandshakeTrace:
+    """Collects how long one request spent opening a connection, from
+    httpcore's trace events. Empty when a pooled connection was reused."""
+
+    PHASES = {"connect_tcp": "connect", "start_tls": "tls"}
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+        self._started: dict[str, float] = {}
+
+    def __call__(self, event: str, info: dict) -> None:
+        _, _, rest = event.partition(".")
+        phase, _, stage = rest.rpartition(".")
+        if phase not in self.PHASES:
+            return
+        if stage == "started":
+            self._started[phase] = time.perf_counter()
+        elif stage == "complete":
+            self.phases[self.PHASES[phase]] = (time.perf_counter() - self._started[phase]) * 1000
+
+
+def _trace_request(request: httpx.Request) -> None:
+    global _last_request
+    _last_request = time.monotonic()
+    request.extensions["trace"] = HandshakeTrace()
+
+
+def _log_handshake(response: httpx.Response) -> None:
+    trace = response.request.extensions.get("trace")
+    if not isinstance(trace, HandshakeTrace):
+        return
+    if trace.phases:
+        detail = "new connection (" + ", ".join(f"{k} {ms:.1f} ms" for k, ms in trace.phases.items()) + ")"
+    else:
+        detail = "reused connection"
+    print(f"{response.request.method} {response.request.url.path}: {detail}")
+
+
+def client() -> Groq:
+    """The shared client, built on first use over a keep-alive connection pool."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=4, max_keepalive_connections=2, keepalive_expiry=KEEPALIVE_SECONDS
+                ),
+                timeout=httpx.Timeout(60.0, connect=5.0),
+                event_hooks={"request": [_trace_request], "response": [_log_handshake]},
+            )
+            _client = Groq(api_key=os.getenv("GROQ_API_KEY"), http_client=http_client)
+        return _client
+
+
+def warm_up() -> None:
+    """Make a cheap request so a connection is open before it is needed."""
+    start = time.perf_counter()
+    try:
+        client().models.list()
+    except Exception as e:
+        print(f"Warm-up failed: {e}")
+        return
+    print(f"Warmed up in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def keep_warm(interval: float = WARM_INTERVAL) -> threading.Thread:
+    """Warm up now, then again whenever `interval` seconds pass without a
+    request, on a daemon thread."""
+
+    def run() -> None:
+        while True:
+            idle = time.monotonic() - _last_request
+            if idle >= interval:
+                warm_up()
+                idle = 0
+            time.sleep(interval - idle)
 
+    thread = threading.Thread(target=run, name="keep-warm", daemon=True)
+    thread.start()
+    return thread
 
-def reformat_prompt(text: str) -> str:
+
+def response_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
+
+
+def _messages(text: str) -> list[dict]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": text},
+    ]
+
+
+def reformat_prompt(text: str, use_cache: bool = CACHE_ENABLED) -> str:
     if not text.strip():
         return text
 
-    response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": text},
-        ],
-        temperature=0.3,
+    key = cache_key(text, MODEL, TEMPERATURE, SYSTEM_PROMPT)
+    if use_cache and (cached := response_cache().get(key)) is not None:
+        return cached
+
+    response = client().chat.completions.create(
+        model=MODEL,
+        messages=_messages(text),
+        temperature=TEMPERATURE,
+        max_tokens=2048,
+    )
+
+    content = response.choices[0].message.content
+    if not content:
+        return text
+    if use_cache:
+        response_cache().put(key, content)
+    return content
+
+
+def _ends_sentence(buffer: str, match: re.Match) -> bool:
+    if match.group() != ".":
+        return True
+    head = buffer[: match.start()].rsplit(None, 1)
+    word = head[-1].lstrip("([\"'").lower() if head else ""
+    return word not in _ABBREVIATIONS and not (len(word) == 1 and word.isalpha())
+
+
+def _split_point(buffer: str) -> int:
+    ends = [m.end() for m in _SENTENCE_END.finditer(buffer) if _ends_sentence(buffer, m)]
+    if ends:
+        return ends[-1]
+    if len(buffer) >= MAX_CHUNK_CHARS:
+        return buffer.rfind(" ") + 1 or len(buffer)
+    return 0
+
+
+def stream_reformat(
+    text: str, use_cache: bool = CACHE_ENABLED, timings: dict | None = None
+) -> Iterator[str]:
+    """Yield the reformatted prompt in sentence-sized chunks as the completion
+    streams in. If given, `timings` gets ttft_ms (time to first token) and
+    total_ms."""
+    timings = {} if timings is None else timings
+    start = time.perf_counter()
+    if not text.strip():
+        yield text
+        return
+
+    key = cache_key(text, MODEL, TEMPERATURE, SYSTEM_PROMPT)
+    if use_cache and (cached := response_cache().get(key)) is not None:
+        timings["ttft_ms"] = timings["total_ms"] = (time.perf_counter() - start) * 1000
+        yield cached
+        return
+
+    stream = client().chat.completions.create(
+        model=MODEL,
+        messages=_messages(text),
+        temperature=TEMPERATURE,
         max_tokens=2048,
+        stream=True,
     )
 
-    return response.choices[0].message.content or text
+    parts: list[str] = []
+    buffer = ""
+    for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if not delta:
+            continue
+        if not parts:
+            timings["ttft_ms"] = (time.perf_counter() - start) * 1000
+        parts.append(delta)
+        buffer += delta
+        if split := _split_point(buffer):
+            yield buffer[:split]
+            buffer = buffer[split:]
+    timings["total_ms"] = (time.perf_counter() - start) * 1000
+
+    if not parts:
+        yield text
+        return
+    if buffer:
+        yield buffer
+    if use_cache:
+        response_cache().put(key, "".join(parts))
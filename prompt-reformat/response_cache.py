@@ -0,0 +1,113 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+CACHE_FILE = Path.home() / ".cache" / "prompt-reformat" / "responses.db"
+TTL_SECONDS = 7 * 24 * 3600
+MAX_ENTRIES = 500
+MAX_BYTES = 5 * 1024 * 1024
+
+
+def normalize(text: str) -> str:
+    """Collapse differences a re-copy of the same selection can introduce."""
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def cache_key(text: str, model: str, temperature: float, system_prompt: str) -> str:
+    payload = json.dumps([normalize(text), model, temperature, system_prompt])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResponseCache:
+    """On-disk LRU of completions. Entries expire after `ttl` seconds, and the
+    least recently used go first once the cache holds more than `max_entries`
+    or `max_bytes` of responses."""
+
+    def __init__(
+        self,
+        path: Path = CACHE_FILE,
+        ttl: float = TTL_SECONDS,
+        max_entries: int = MAX_ENTRIES,
+        max_bytes: int = MAX_BYTES,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # A hit only bumps `used`; WAL without fsync keeps that off the disk's latency.
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_used ON responses (used)")
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self.misses += 1
+                return None
+            try:
+                self._conn.execute("UPDATE responses SET used = ? WHERE key = ?", (now, key))
+            except sqlite3.Error as e:
+                # The hit stands; only its place in the LRU order is lost.
+                print(f"Response cache update failed: {e}")
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        """Store a response. The cache is best effort: a failed write (locked
+        database, full disk) is rolled back and reported, never raised."""
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                    (key, response, len(response.encode()), now, now),
+                )
+                self._evict(now)
+        except sqlite3.Error as e:
+            print(f"Response cache write failed: {e}")
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN "
+            "(SELECT key FROM responses ORDER BY used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN (SELECT key FROM "
+            "(SELECT key, SUM(size) OVER (ORDER BY used DESC, key) AS total FROM responses) "
+            "WHERE total > ?)",
+            (self.max_bytes,),
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,43 @@
+import threading
+
+import pytest
+
+import fake_server
+import reformat
+from response_cache import ResponseCache
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    cache = ResponseCache(tmp_path / "responses.db")
+    monkeypatch.setattr(reformat, "_cache", cache)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def start_server(monkeypatch):
+    """Start the fake completions API (with optional delays) and point a
+    fresh client at it."""
+    servers = []
+
+    def start(ttft: float = 0.0, token_delay: float = 0.0):
+        server = fake_server.serve(ttft=ttft, token_delay=token_delay)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        monkeypatch.setenv("GROQ_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}")
+        monkeypatch.setenv("GROQ_API_KEY", "fake")
+        monkeypatch.setattr(reformat, "_client", None)
+        return server
+
+    yield start
+    if reformat._client is not None:
+        reformat._client.close()
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def server(start_server):
+    return start_server()
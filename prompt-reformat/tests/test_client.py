@@ -0,0 +1,35 @@
+import reformat
+
+
+def test_client_built_on_first_use(server):
+    assert reformat._client is None
+    assert reformat.client() is reformat.client()
+
+
+def test_warm_up_connection_is_reused(server, capsys):
+    reformat.warm_up()
+    assert server.connections == 1
+    assert reformat.reformat_prompt("First.", use_cache=False) == "First."
+    assert list(reformat.stream_reformat("Second. Third.", use_cache=False)) == ["Second.", " Third."]
+    assert server.connections == 1
+    log = capsys.readouterr().out.splitlines()
+    assert log[0].startswith("GET /openai/v1/models: new connection (connect ")
+    assert log[1].startswith("Warmed up in ")
+    assert log[2:] == [
+        "POST /openai/v1/chat/completions: reused connection",
+        "POST /openai/v1/chat/completions: reused connection",
+    ]
+
+
+def test_handshake_trace_times_connection_phases():
+    trace = reformat.HandshakeTrace()
+    for event in (
+        "connection.connect_tcp.started",
+        "connection.connect_tcp.complete",
+        "connection.start_tls.started",
+        "connection.start_tls.complete",
+        "http11.send_request_headers.started",
+    ):
+        trace(event, {})
+    assert list(trace.phases) == ["connect", "tls"]
+    assert reformat.HandshakeTrace().phases == {}
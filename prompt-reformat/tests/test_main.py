@@ -0,0 +1,45 @@
+import pytest
+
+import main
+
+
+@pytest.fixture
+def clipboard(monkeypatch):
+    """Stand-ins for the clipboard and Cmd+V: what was set, whether it was
+    marked transient, and what got pasted (with that mark)."""
+    state = {"clipboard": None, "transient": False, "pasted": []}
+
+    def set_clipboard(text, transient=False):
+        state.update(clipboard=text, transient=transient)
+
+    monkeypatch.setattr(main, "set_clipboard", set_clipboard)
+    monkeypatch.setattr(
+        main, "simulate_paste", lambda: state["pasted"].append((state["clipboard"], state["transient"]))
+    )
+    monkeypatch.setattr(main.time, "sleep", lambda seconds: None)
+    return state
+
+
+def test_pastes_each_chunk_and_leaves_whole_result(clipboard, server):
+    main.paste_streamed("One. Two.", {})
+    # Only the whole result is a write clipboard history should keep.
+    assert clipboard == {
+        "clipboard": "One. Two.",
+        "transient": False,
+        "pasted": [("One.", True), (" Two.", True)],
+    }
+
+
+def test_failed_stream_puts_original_back(clipboard, monkeypatch):
+    def broken(text, timings):
+        yield "Partial."
+        raise ConnectionError("stream dropped")
+
+    monkeypatch.setattr(main, "stream_reformat", broken)
+    with pytest.raises(ConnectionError):
+        main.paste_streamed("the original prompt", {})
+    assert clipboard == {
+        "clipboard": "the original prompt",
+        "transient": False,
+        "pasted": [("Partial.", True)],
+    }
@@ -0,0 +1,87 @@
+import sqlite3
+
+import pytest
+
+import reformat
+import response_cache
+from response_cache import ResponseCache, cache_key
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def time(self) -> float:
+        self.now += 1
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache, "time", clock)
+    return clock
+
+
+def test_key_ignores_line_endings_and_trailing_space():
+    key = cache_key("fix  the bug\nplease", "m", 0.3, "s")
+    assert cache_key("fix  the bug \r\nplease\n", "m", 0.3, "s") == key
+    assert cache_key("a", "m", 0.3, "s") != cache_key("a", "m", 0.5, "s")
+    assert cache_key("a", "m", 0.3, "s") != cache_key("a", "m", 0.3, "other prompt")
+
+
+def test_counts_hits_and_misses(cache):
+    assert cache.get("k") is None
+    cache.put("k", "reply")
+    assert cache.get("k") == "reply"
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1, "bytes": 5}
+
+
+def test_entries_expire(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "r.db", ttl=10)
+    cache.put("k", "reply")
+    assert cache.get("k") == "reply"
+    clock.now += 10
+    assert cache.get("k") is None
+    assert cache.misses == 1
+
+
+def test_evicts_least_recently_used_by_count(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "r.db", max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+    assert [cache.get(k) for k in "abc"] == ["1", None, "3"]
+
+
+def test_evicts_least_recently_used_by_size(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "r.db", max_bytes=10)
+    cache.put("a", "aaaa")
+    cache.put("b", "bbbb")
+    cache.get("a")
+    cache.put("c", "cccc")
+    assert [cache.get(k) for k in "abc"] == ["aaaa", None, "cccc"]
+    assert cache.stats()["bytes"] == 8
+
+
+def test_failed_write_is_rolled_back(cache, monkeypatch, capsys):
+    def fail(now: float) -> None:
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(cache, "_evict", fail)
+    cache.put("a", "1")
+    assert "database is locked" in capsys.readouterr().out
+    del cache._evict
+    cache.put("b", "2")
+    assert (cache.get("a"), cache.get("b")) == (None, "2")
+
+
+def test_bypass_neither_reads_nor_writes(cache, server):
+    key = cache_key("Fix it.", reformat.MODEL, reformat.TEMPERATURE, reformat.SYSTEM_PROMPT)
+    cache.put(key, "cached")
+    assert reformat.reformat_prompt("Fix it.", use_cache=False) == "Fix it."
+    assert reformat.reformat_prompt("Other.", use_cache=False) == "Other."
+    assert cache.stats()["entries"] == 1
+    assert reformat.reformat_prompt("Fix it.") == "cached"
+    assert (cache.hits, cache.misses) == (1, 0)
@@ -0,0 +1,53 @@
+import pytest
+
+import reformat
+
+
+@pytest.mark.parametrize(
+    "buffer, split",
+    [
+        ("no terminator yet", 0),
+        ("Ends at the buffer end.", 0),
+        ("Version 3.", 0),
+        ("One. Two", 4),
+        ("One. Two! Three", 9),
+        ("First line\nsecond", 11),
+        ("Use a map, e.g. a dict", 0),
+        ("Ask Dr. Smith", 0),
+        ("By J. R. R. Tolkien", 0),
+        ("(i.e. the cache) was hit. Then", 25),
+    ],
+)
+def test_split_point(buffer, split):
+    assert reformat._split_point(buffer) == split
+
+
+def test_long_run_without_terminator_splits_at_a_space(monkeypatch):
+    monkeypatch.setattr(reformat, "MAX_CHUNK_CHARS", 10)
+    assert reformat._split_point("words without an end") == 17
+    assert reformat._split_point("x" * 12) == 12
+
+
+def test_streams_sentence_chunks(server):
+    text = "First sentence here. Second one, e.g. this! Third\nlast bit"
+    timings: dict = {}
+    chunks = list(reformat.stream_reformat(text, timings=timings))
+    assert chunks == ["First sentence here.", " Second one, e.g. this!", " Third\n", "last bit"]
+    assert 0 < timings["ttft_ms"] <= timings["total_ms"]
+
+
+def test_first_token_time_excludes_generation(start_server):
+    start_server(ttft=0.1, token_delay=0.02)
+    timings: dict = {}
+    list(reformat.stream_reformat("one two three four five six seven", timings=timings))
+    assert timings["ttft_ms"] >= 100
+    assert timings["total_ms"] - timings["ttft_ms"] >= 100
+
+
+def test_cache_hit_is_one_chunk(server, cache):
+    text = "Cached once. Then replayed."
+    assert list(reformat.stream_reformat(text)) == ["Cached once.", " Then replayed."]
+    timings: dict = {}
+    assert list(reformat.stream_reformat(text, timings=timings)) == [text]
+    assert timings["ttft_ms"] == timings["total_ms"]
+    assert (cache.hits, cache.misses) == (1, 1)